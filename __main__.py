@@ -1,12 +1,14 @@
 # -*- coding: utf-8 -*-
-from sys import version_info
+from multiprocessing import freeze_support
+from sys import argv, version_info
 from warnings import filterwarnings
 
-from docx_modify.const import log_folder
 from docx_modify.exceptions import InvalidPythonVersion
 
 
 def main():
+    # required for the worker processes in the frozen executable
+    freeze_support()
     filterwarnings("ignore")
 
     if version_info < (3, 8):
@@ -14,8 +16,11 @@ def main():
         input("Нажмите <Enter>, чтобы закрыть окно ...")
         raise InvalidPythonVersion
 
-    if not log_folder.exists():
-        log_folder.mkdir(parents=True, exist_ok=True)
+    # the arguments are passed only in the headless mode, see docx_modify/cli.py
+    if len(argv) > 1:
+        from docx_modify.cli import run_cli
+
+        raise SystemExit(run_cli(argv[1:]))
 
     try:
         from docx_modify.file_processing import run_script
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from argparse import ArgumentParser, Namespace
+from json import dump
+from pathlib import Path
+from typing import Any
+
+from benchmarks.run import iter_cases, run_benchmarks
+from docx_modify.enum_element import CompressionProfile, DocumentMode
+
+
+def _parser() -> ArgumentParser:
+    parser: ArgumentParser = ArgumentParser(
+        prog="python -m benchmarks",
+        description="Замер времени обработки синтетических документов по этапам.")
+    parser.add_argument("--sections", type=int, nargs="+", default=[1, 10, 100], help="число разделов")
+    parser.add_argument("--landscape", type=float, nargs="+", default=[0.0, 0.3], help="доля альбомных разделов")
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[100, 5000], help="число абзацев")
+    parser.add_argument("--media", type=int, nargs="+", default=[0, 10], help="число изображений")
+    parser.add_argument("--media-size", type=int, default=1 << 20, help="размер изображения в байтах")
+    parser.add_argument(
+        "--custom", type=int, nargs="+", choices=[0, 1], default=[1, 0], help="наличие файла docProps/custom.xml")
+    parser.add_argument(
+        "--mode",
+        nargs="+",
+        choices=[document_mode.value for document_mode in DocumentMode],
+        default=[document_mode.value for document_mode in DocumentMode],
+        help="виды документа")
+    parser.add_argument("--repeat", type=int, default=3, help="число повторов для каждого документа")
+    parser.add_argument("--seed", type=int, default=0, help="начальное значение генератора")
+    parser.add_argument("--on-disk", action="store_true", help="распаковывать файлы во временную директорию")
+    parser.add_argument("--stream", action="store_true", help="изменять word/document.xml потоково")
+    parser.add_argument(
+        "--compression",
+        default=None,
+        choices=[compression.value for compression in CompressionProfile],
+        help="сжатие нового файла, по умолчанию default")
+    parser.add_argument("--corpus", type=Path, default=None, help="директория для документов, по умолчанию временная")
+    parser.add_argument(
+        "--output", type=Path, default=Path("benchmark.json"), help="файл результатов, по умолчанию benchmark.json")
+    return parser
+
+
+def main():
+    namespace: Namespace = _parser().parse_args()
+
+    results: dict[str, Any] = run_benchmarks(
+        iter_cases(
+            namespace.sections,
+            namespace.landscape,
+            namespace.paragraphs,
+            namespace.media,
+            namespace.media_size,
+            [bool(custom) for custom in namespace.custom],
+            namespace.seed),
+        [DocumentMode(document_mode) for document_mode in namespace.mode],
+        namespace.repeat,
+        not namespace.on_disk,
+        namespace.stream,
+        namespace.corpus,
+        CompressionProfile(namespace.compression) if namespace.compression is not None else None)
+
+    with open(namespace.output, "w", encoding="utf-8") as f:
+        dump(results, f, ensure_ascii=False, indent=2)
+
+    print(f"Результаты записаны в файл {namespace.output}")
+
+
+if __name__ == "__main__":
+    main()
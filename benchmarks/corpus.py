@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+from pathlib import Path
+from random import Random
+from typing import NamedTuple
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
+
+__all__ = ["CorpusCase", "make_document"]
+
+_NS_W: str = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_NS_R: str = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_NS_REL: str = "http://schemas.openxmlformats.org/package/2006/relationships"
+_NS_CT: str = "http://schemas.openxmlformats.org/package/2006/content-types"
+_NS_CUSTOM: str = "http://schemas.openxmlformats.org/officeDocument/2006/custom-properties"
+_NS_VT: str = "http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes"
+_REL_TYPE: str = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_DECLARATION: str = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+_WORDS: tuple[str, ...] = (
+    "документ", "изделие", "система", "модуль", "параметр", "значение", "таблица", "раздел", "требование",
+    "проверка", "interface", "server", "client", "request", "response", "timeout", "buffer", "session")
+
+
+class CorpusCase(NamedTuple):
+    """Parameters of the synthetic document.
+
+    Attributes:
+        sections (int): The number of the sections
+        landscape (float): The share of the landscape sections, from 0 to 1
+        paragraphs (int): The number of the paragraphs in the body
+        media (int): The number of the embedded images
+        media_size (int): The size of each image in bytes
+        custom (bool): The flag to add the docProps/custom.xml file
+        seed (int): The seed of the pseudo-random generator
+    """
+    sections: int = 3
+    landscape: float = 0.0
+    paragraphs: int = 100
+    media: int = 0
+    media_size: int = 1 << 20
+    custom: bool = True
+    seed: int = 0
+
+    def __str__(self):
+        return (
+            f"s{self.sections}_l{round(self.landscape * 100)}_p{self.paragraphs}_"
+            f"m{self.media}x{self.media_size}_c{int(self.custom)}")
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({str(self)})>"
+
+
+def _paragraph(random: Random) -> str:
+    text: str = " ".join(random.choice(_WORDS) for _ in range(random.randint(5, 30)))
+    return f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def _section(orientation: str) -> str:
+    if orientation == "landscape":
+        pg_sz: str = '<w:pgSz w:w="16838" w:h="11906" w:orient="landscape"/>'
+
+    else:
+        pg_sz: str = '<w:pgSz w:w="11906" w:h="16838"/>'
+
+    return (
+        f'<w:sectPr><w:headerReference w:type="default" r:id="rId3"/>{pg_sz}'
+        f'<w:pgMar w:top="1134" w:right="850" w:bottom="1134" w:left="1701" w:header="708" w:footer="708" '
+        f'w:gutter="0"/><w:cols w:space="708"/></w:sectPr>')
+
+
+def _document(case: CorpusCase, random: Random) -> str:
+    sections: int = max(case.sections, 1)
+    landscape: set[int] = set(random.sample(range(sections), round(sections * case.landscape)))
+    per_section, remainder = divmod(case.paragraphs, sections)
+    body: list[str] = []
+
+    for index in range(sections):
+        body.extend(_paragraph(random) for _ in range(per_section + (index < remainder)))
+
+        for media_index in range(index, case.media, sections):
+            body.append(
+                f'<w:p><w:r><w:drawing><wp:inline xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/'
+                f'wordprocessingDrawing"><wp:docPr id="{media_index + 1}" name="image{media_index + 1}"/>'
+                f'</wp:inline></w:drawing><w:t xml:space="preserve"> rId{media_index + 10}</w:t></w:r></w:p>')
+
+        section: str = _section("landscape" if index in landscape else "portrait")
+
+        if index == sections - 1:
+            body.append(section)
+
+        else:
+            body.append(f"<w:p><w:pPr>{section}</w:pPr></w:p>")
+
+    return (
+        f'{_DECLARATION}<w:document xmlns:w="{_NS_W}" xmlns:r="{_NS_R}"><w:body>{"".join(body)}</w:body>'
+        f'</w:document>')
+
+
+def _content_types(case: CorpusCase) -> str:
+    _main: str = "application/vnd.openxmlformats-officedocument"
+    overrides: list[tuple[str, str]] = [
+        ("/word/document.xml", f"{_main}.wordprocessingml.document.main+xml"),
+        ("/word/styles.xml", f"{_main}.wordprocessingml.styles+xml"),
+        ("/word/settings.xml", f"{_main}.wordprocessingml.settings+xml"),
+        ("/word/header1.xml", f"{_main}.wordprocessingml.header+xml")]
+
+    if case.custom:
+        overrides.append(("/docProps/custom.xml", f"{_main}.custom-properties+xml"))
+
+    _overrides: str = "".join(
+        f'<Override PartName="{part_name}" ContentType="{content_type}"/>' for part_name, content_type in overrides)
+
+    return (
+        f'{_DECLARATION}<Types xmlns="{_NS_CT}">'
+        f'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        f'<Default Extension="xml" ContentType="application/xml"/>'
+        f'<Default Extension="png" ContentType="image/png"/>{_overrides}</Types>')
+
+
+def _relationships(case: CorpusCase) -> str:
+    custom: str = (
+        f'<Relationship Id="rId2" Type="{_REL_TYPE}/custom-properties" Target="docProps/custom.xml"/>'
+        if case.custom else "")
+
+    return (
+        f'{_DECLARATION}<Relationships xmlns="{_NS_REL}">'
+        f'<Relationship Id="rId1" Type="{_REL_TYPE}/officeDocument" Target="word/document.xml"/>{custom}'
+        f'</Relationships>')
+
+
+def _document_relationships(case: CorpusCase) -> str:
+    media: str = "".join(
+        f'<Relationship Id="rId{index + 10}" Type="{_REL_TYPE}/image" Target="media/image{index + 1}.png"/>'
+        for index in range(case.media))
+
+    return (
+        f'{_DECLARATION}<Relationships xmlns="{_NS_REL}">'
+        f'<Relationship Id="rId1" Type="{_REL_TYPE}/styles" Target="styles.xml"/>'
+        f'<Relationship Id="rId2" Type="{_REL_TYPE}/settings" Target="settings.xml"/>'
+        f'<Relationship Id="rId3" Type="{_REL_TYPE}/header" Target="header1.xml"/>{media}'
+        f'</Relationships>')
+
+
+def _custom(random: Random) -> str:
+    _fmtid: str = "{D5CDD505-2E9C-101B-9397-08002B2CF9AE}"
+    decimal_number: str = f"ПАМР.{random.randint(0, 99999):05d}-01"
+    properties: list[tuple[str, str]] = [
+        ("DocumentName", "Руководство оператора"),
+        ("DocumentType", "Руководство оператора"),
+        ("DecimalNumber", decimal_number),
+        ("DocumentTypeShort", "34")]
+
+    _properties: str = "".join(
+        f'<property fmtid="{_fmtid}" pid="{pid}" name="{name}"><vt:lpwstr>{value}</vt:lpwstr></property>'
+        for pid, (name, value) in enumerate(properties, 2))
+
+    return f'{_DECLARATION}<Properties xmlns="{_NS_CUSTOM}" xmlns:vt="{_NS_VT}">{_properties}</Properties>'
+
+
+def _media(size: int, random: Random) -> bytes:
+    # the images are already compressed, so the content is incompressible
+    return b"\x89PNG\r\n\x1a\n" + random.randbytes(max(size - 8, 0))
+
+
+def _write(zf: ZipFile, name: str, content: str | bytes, compress_type: int = ZIP_DEFLATED):
+    # the fixed timestamp keeps the file the same byte by byte
+    zip_info: ZipInfo = ZipInfo(name, (1980, 1, 1, 0, 0, 0))
+    zip_info.compress_type = compress_type
+    zf.writestr(zip_info, content)
+
+
+def make_document(path: Path, case: CorpusCase) -> Path:
+    """Writes the synthetic document, the same case always produces the same file."""
+    random: Random = Random(case.seed)
+    styles: str = (
+        f'{_DECLARATION}<w:styles xmlns:w="{_NS_W}"><w:style w:type="paragraph" w:default="1" w:styleId="a">'
+        f'<w:name w:val="Normal"/></w:style><w:style w:type="paragraph" w:styleId="_style_text_14_">'
+        f'<w:name w:val="_style_text_14_"/></w:style></w:styles>')
+    settings: str = f'{_DECLARATION}<w:settings xmlns:w="{_NS_W}"><w:zoom w:percent="100"/></w:settings>'
+    header: str = f'{_DECLARATION}<w:hdr xmlns:w="{_NS_W}"><w:p/></w:hdr>'
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with ZipFile(path, "w") as zf:
+        _write(zf, "[Content_Types].xml", _content_types(case))
+        _write(zf, "_rels/.rels", _relationships(case))
+        _write(zf, "word/document.xml", _document(case, random))
+        _write(zf, "word/_rels/document.xml.rels", _document_relationships(case))
+        _write(zf, "word/styles.xml", styles)
+        _write(zf, "word/settings.xml", settings)
+        _write(zf, "word/header1.xml", header)
+
+        if case.custom:
+            _write(zf, "docProps/custom.xml", _custom(random))
+
+        for index in range(case.media):
+            _write(zf, f"word/media/image{index + 1}.png", _media(case.media_size, random), ZIP_STORED)
+
+    return path
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+from contextlib import redirect_stdout
+from io import StringIO
+from itertools import product
+from pathlib import Path
+from platform import platform, python_version
+from shutil import rmtree
+from statistics import median
+from tempfile import mkdtemp
+from time import perf_counter, strftime
+from typing import Any, Iterable, Iterator
+
+from loguru import logger
+
+from benchmarks.corpus import CorpusCase, make_document
+from docx_modify import file_processing
+from docx_modify.const import version
+from docx_modify.core_elements.parallel_deflate import parallel_deflate
+from docx_modify.enum_element import CompressionProfile, DocumentMode, DocumentSide, FileItem
+from docx_modify.instrumentation import instrumentation
+from docx_modify.result_cache import result_cache
+
+__all__ = ["iter_cases", "run_benchmarks"]
+
+
+def iter_cases(
+        sections: Iterable[int],
+        landscape: Iterable[float],
+        paragraphs: Iterable[int],
+        media: Iterable[int],
+        media_size: int,
+        custom: Iterable[bool],
+        seed: int = 0) -> Iterator[CorpusCase]:
+    """All combinations of the values along the axes."""
+    for _sections, _landscape, _paragraphs, _media, _custom in product(sections, landscape, paragraphs, media, custom):
+        yield CorpusCase(_sections, _landscape, _paragraphs, _media, media_size, _custom, seed)
+
+
+def _file_item(path: Path, document_mode: DocumentMode) -> FileItem:
+    # the typographic mode does not allow the additional options, as in the graphical interface
+    options: bool = document_mode != DocumentMode.TYPO
+    return FileItem(path, document_mode, DocumentSide.MIRROR, False, options, options)
+
+
+def _median_stage(values: list[dict[str, Any]]) -> dict[str, Any]:
+    # the counters are the same in all runs, the peak memory only grows
+    return {
+        **values[-1],
+        "wall": median(value.get("wall") for value in values),
+        "cpu": median(value.get("cpu") for value in values)}
+
+
+def _run_case(
+        path: Path,
+        document_mode: DocumentMode,
+        repeat: int,
+        in_memory: bool,
+        streaming: bool) -> dict[str, Any]:
+    totals: list[float] = []
+    stages: dict[str, list[dict[str, Any]]] = {}
+
+    for _ in range(repeat):
+        # the messages of file_modify distort the timings
+        with instrumentation.document(path) as metrics, redirect_stdout(StringIO()):
+            start: float = perf_counter()
+            name_updated: str = file_processing.file_modify(_file_item(path, document_mode), in_memory, streaming)
+            totals.append(perf_counter() - start)
+
+        # the next run must produce the file with the same name
+        Path(name_updated).unlink()
+
+        for stage_metrics in metrics.get("stages"):
+            stages.setdefault(stage_metrics.get("stage"), []).append(stage_metrics)
+
+    return {
+        "total": {"min": min(totals), "median": median(totals), "runs": totals},
+        "stages": {name: _median_stage(values) for name, values in stages.items()}}
+
+
+def run_benchmarks(
+        cases: Iterable[CorpusCase],
+        document_modes: Iterable[DocumentMode] = tuple(DocumentMode),
+        repeat: int = 3,
+        in_memory: bool = True,
+        streaming: bool = False,
+        path_dir: Path | None = None,
+        compression: CompressionProfile | None = None) -> dict[str, Any]:
+    """Times file_modify and its stages for each document and mode.
+
+    The documents are generated in path_dir or in a temp directory removed afterwards.
+    The new files are compressed with the profile, the current one if not specified.
+    The messages of docx_modify are disabled while running and enabled afterwards, the handlers are kept.
+    """
+    _remove: bool = path_dir is None
+    path_dir: Path = Path(mkdtemp(prefix="_docx_bench_")) if path_dir is None else path_dir
+    document_modes: tuple[DocumentMode, ...] = (*document_modes,)
+    results: list[dict[str, Any]] = []
+
+    # the messages distort the timings
+    logger.disable("docx_modify")
+    _metrics_path: str | None = instrumentation.path
+    instrumentation.configure("-")
+    # the repeated runs must process the file, not copy it from the cache
+    _cache_size: int = result_cache.max_size
+    result_cache.configure(0)
+    _compression: CompressionProfile = parallel_deflate.compression
+    parallel_deflate.configure(compression=compression)
+
+    try:
+        for case in cases:
+            path: Path = make_document(path_dir.joinpath(f"{case}.docx"), case)
+
+            for document_mode in document_modes:
+                result: dict[str, Any] = _run_case(path, document_mode, repeat, in_memory, streaming)
+                results.append({
+                    "case": case._asdict(),
+                    "name": str(case),
+                    "size": path.stat().st_size,
+                    "mode": document_mode.value,
+                    **result})
+                print(f"{case} {document_mode.value}: {result['total']['median']:.3f} s")
+
+    finally:
+        logger.enable("docx_modify")
+        instrumentation.configure(_metrics_path)
+        result_cache.configure(_cache_size)
+        parallel_deflate.configure(compression=_compression)
+
+        if _remove:
+            rmtree(path_dir, True)
+
+    return {
+        "version": version(),
+        "python": python_version(),
+        "platform": platform(),
+        "timestamp": strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "repeat": repeat,
+        "in_memory": in_memory,
+        "streaming": streaming,
+        "compression": (compression or _compression).value,
+        "results": results}
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from subprocess import PIPE, run
+from sys import executable
+from typing import NamedTuple
+
+__all__ = ["ImportTime", "import_times", "main"]
+
+# the modules imported by the single-file conversion from the command line
+_MODULES: tuple[str, ...] = ("docx_modify.cli", "docx_modify.batch_processing")
+_ROOT: Path = Path(__file__).parent.parent
+
+
+class ImportTime(NamedTuple):
+    """The import time of the module reported by -X importtime.
+
+    Attributes:
+        module (str): The name of the module
+        self_time (float): The time of the module itself in seconds
+        cumulative (float): The time of the module and its imports in seconds
+    """
+    module: str
+    self_time: float
+    cumulative: float
+
+    def __str__(self):
+        return f"{self.module}: {self.cumulative * 1000:.1f} мс"
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({self._asdict().values()})>"
+
+
+def import_times(modules: tuple[str, ...] = _MODULES) -> list[ImportTime]:
+    """The import times of the modules and their imports in the new interpreter, in the order of the import."""
+    completed = run(
+        [executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        stdout=PIPE, stderr=PIPE, cwd=_ROOT, text=True, check=True)
+    results: list[ImportTime] = []
+
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        _self, _cumulative, _module = line.removeprefix("import time:").split("|")
+        results.append(ImportTime(_module.strip(), int(_self) / 1e6, int(_cumulative) / 1e6))
+
+    return results
+
+
+def _parser() -> ArgumentParser:
+    parser: ArgumentParser = ArgumentParser(
+        prog="python -m benchmarks.startup",
+        description="Замер времени импорта модулей при запуске из командной строки.")
+    parser.add_argument(
+        "--budget", type=float, default=0.5, help="допустимое время импорта в секундах, по умолчанию 0.5")
+    parser.add_argument("--top", type=int, default=15, help="число самых долгих модулей в отчете")
+    parser.add_argument("--repeat", type=int, default=5, help="число замеров, используется наименьший")
+    return parser
+
+
+def main() -> int:
+    namespace: Namespace = _parser().parse_args()
+    # the first run fills the bytecode cache, the smallest time is the least distorted
+    runs: list[list[ImportTime]] = [import_times() for _ in range(max(namespace.repeat, 1))]
+    _totals: list[float] = [
+        sum(import_time.cumulative for import_time in _run if import_time.module in _MODULES) for _run in runs]
+    total: float = min(_totals)
+    best: list[ImportTime] = runs[_totals.index(total)]
+
+    for import_time in sorted(best, key=lambda item: item.self_time, reverse=True)[:namespace.top]:
+        print(f"{import_time.module:<48}{import_time.self_time * 1000:>10.1f}{import_time.cumulative * 1000:>12.1f}")
+
+    print(f"Время импорта: {total:.3f} с, допустимое: {namespace.budget:.3f} с")
+
+    return 0 if total <= namespace.budget else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
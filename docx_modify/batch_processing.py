@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from os import cpu_count, getenv
+from typing import Iterable
+
+from loguru import logger
+
+from docx_modify.core_elements.parallel_deflate import parallel_deflate
+from docx_modify.core_elements.template_registry import templates
+from docx_modify.enum_element import CompressionProfile, FileItem, FileResult
+from docx_modify.file_processing import process_file
+from docx_modify.init_logger import buffer_logging
+from docx_modify.instrumentation import instrumentation
+from docx_modify.result_cache import result_cache
+
+__all__ = ["default_workers", "run_batch"]
+
+
+def default_workers() -> int:
+    """The number of the worker processes, may be set by the DOCX_MODIFY_WORKERS variable.
+
+    The value 0 means the number of the CPU cores.
+    """
+    _workers: str = getenv("DOCX_MODIFY_WORKERS", "1")
+
+    try:
+        workers: int = int(_workers)
+
+    except ValueError:
+        logger.warning(f"Некорректное число процессов {_workers}, файлы обрабатываются последовательно")
+        return 1
+
+    if workers <= 0:
+        return cpu_count() or 1
+
+    return workers
+
+
+def _init_worker(
+        metrics_path: str | None = None,
+        cache_size: int = 0,
+        zip_threads: int = 1,
+        compression: CompressionProfile = CompressionProfile.DEFAULT):
+    # the results are logged by the main process, the workers keep the messages to write them on errors
+    buffer_logging()
+    # the metrics are returned with the results and reported by the main process
+    instrumentation.configure(metrics_path)
+    result_cache.configure(cache_size)
+    parallel_deflate.configure(zip_threads, compression)
+    # the templates are shared by all files processed by the worker
+    templates.warm_up()
+
+
+def _log_result(file_result: FileResult):
+    if file_result.success:
+        logger.success(f'Обработка файла "{file_result.path_file}" завершена')
+        logger.success(f"Новый файл: {file_result.name_updated}")
+
+    else:
+        logger.error(f'Ошибка обработки файла "{file_result.path_file}"')
+        logger.error(file_result.error)
+
+
+def run_batch(
+        file_items: Iterable[FileItem],
+        workers: int = 1,
+        in_memory: bool = True,
+        streaming: bool = False) -> list[FileResult]:
+    """Modifies the files in the worker processes.
+
+    The results are returned in the order of the files. If workers is 1, the files are processed
+    one by one in the current process.
+
+    If the instrumentation is enabled, the metrics of all files are reported at the end.
+    """
+    file_results: list[FileResult] = _run_batch([*file_items], workers, in_memory, streaming)
+    instrumentation.report(file_result.metrics for file_result in file_results)
+    return file_results
+
+
+def _failed_result(file_item: FileItem, e: Exception) -> FileResult:
+    # the unexpected error must not stop processing the other files
+    file_result: FileResult = FileResult(
+        file_item.path_file, None, f"Возникла ошибка {e.__class__.__name__}.\n{str(e)}")
+    _log_result(file_result)
+    return file_result
+
+
+def _run_serial(file_items: list[FileItem], in_memory: bool, streaming: bool) -> list[FileResult]:
+    file_results: list[FileResult] = []
+
+    for file_item in file_items:
+        # the results are logged by process_file itself, only the unexpected errors are logged here
+        try:
+            file_result: FileResult = process_file(file_item, in_memory, streaming)
+
+        except Exception as e:
+            file_result: FileResult = _failed_result(file_item, e)
+
+        file_results.append(file_result)
+
+    return file_results
+
+
+def _run_batch(file_items: list[FileItem], workers: int, in_memory: bool, streaming: bool) -> list[FileResult]:
+    if workers <= 1 or len(file_items) <= 1:
+        return _run_serial(file_items, in_memory, streaming)
+
+    workers: int = min(workers, len(file_items))
+    file_results: dict[int, FileResult] = {}
+    logger.info(f"Обработка {len(file_items)} файлов, число процессов: {workers}")
+    # the processes share the cores, so the threads of the compression are split among them
+    zip_threads: int = max(parallel_deflate.threads // workers, 1)
+    initargs: tuple = (instrumentation.path, result_cache.max_size, zip_threads, parallel_deflate.compression)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as executor:
+        futures: dict[Future, int] = {
+            executor.submit(process_file, file_item, in_memory, streaming): index
+            for index, file_item in enumerate(file_items)}
+
+        for future in as_completed(futures):
+            index: int = futures.get(future)
+            file_item: FileItem = file_items[index]
+
+            try:
+                file_result: FileResult = future.result()
+
+            except Exception as e:
+                file_result: FileResult = _failed_result(file_item, e)
+
+            else:
+                _log_result(file_result)
+
+            file_results[index] = file_result
+
+    return [file_results[index] for index in range(len(file_items))]
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+from argparse import ArgumentParser, Namespace
+from glob import glob, has_magic
+from os import cpu_count
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from loguru import logger
+
+from docx_modify.const import version
+from docx_modify.enum_element import CompressionProfile, DocumentMode, DocumentSide, FileResult, UserInputValues
+from docx_modify.init_logger import console_logging
+
+__all__ = ["run_cli"]
+
+_SUFFIXES: tuple[str, ...] = (".docx", ".docm")
+
+
+def _parser() -> ArgumentParser:
+    parser: ArgumentParser = ArgumentParser(
+        prog="docx_modify",
+        description="Изменение колонтитулов и параметров файлов *.docx/*.docm без графического интерфейса.")
+    parser.add_argument(
+        "files",
+        nargs="+",
+        help="файлы или шаблоны путей к файлам, например, docs/**/*.docx")
+    parser.add_argument(
+        "--mode",
+        required=True,
+        choices=[document_mode.value for document_mode in DocumentMode],
+        help="вид документа: архивный, типографский или программный")
+    parser.add_argument(
+        "--side",
+        default=DocumentSide.MIRROR.value,
+        choices=[document_side.value for document_side in DocumentSide],
+        help="вид печати: односторонняя или двусторонняя, по умолчанию двусторонняя")
+    parser.add_argument(
+        "--def-ministry",
+        action="store_true",
+        help="поставка для Министерства Обороны РФ, только для архивного вида")
+    parser.add_argument(
+        "--change-list",
+        action="store_true",
+        help="добавить Лист регистрации изменений в конец документа")
+    parser.add_argument(
+        "--approvement-list",
+        action="store_true",
+        help="добавить штамп Листа утверждения на титульный лист")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="число процессов для обработки файлов, 0 -- по числу ядер процессора")
+    parser.add_argument(
+        "--on-disk",
+        action="store_true",
+        help="распаковывать файлы во временную директорию вместо обработки в памяти")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="изменять word/document.xml потоково, не загружая целиком, для очень больших документов")
+    parser.add_argument(
+        "--zip-threads",
+        type=int,
+        default=None,
+        help="число потоков для сжатия нового файла, по умолчанию по числу ядер процессора, но не более 4")
+    parser.add_argument(
+        "--compression",
+        default=None,
+        choices=[compression.value for compression in CompressionProfile],
+        help="сжатие нового файла: fast -- быстрое, уже сжатые изображения и вложения не сжимаются, "
+             "default -- обычное, small -- наименьший размер файла")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="обработать файлы заново, не используя и не пополняя кэш результатов")
+    parser.add_argument(
+        "--metrics",
+        nargs="?",
+        const="-",
+        default=None,
+        metavar="PATH",
+        help="замерить время, память и объем данных по этапам и вывести сводную таблицу, "
+             "с PATH -- также дописать замеры в файл JSONL")
+    parser.add_argument(
+        "--version",
+        action="version",
+        version=f"%(prog)s {version()}")
+    return parser
+
+
+def _iter_paths(patterns: Iterable[str]) -> list[Path]:
+    paths: dict[Path, None] = {}
+
+    for pattern in patterns:
+        if not has_magic(pattern):
+            paths[Path(pattern).resolve()] = None
+            continue
+
+        for file in sorted(glob(pattern, recursive=True)):
+            path: Path = Path(file)
+
+            # skip the lock files of the opened documents
+            if path.suffix.lower() in _SUFFIXES and not path.name.startswith("~$"):
+                paths[path.resolve()] = None
+
+    return [*paths]
+
+
+def _user_input_values(namespace: Namespace, path_files: list[Path]) -> UserInputValues:
+    document_mode: DocumentMode = DocumentMode(namespace.mode)
+    document_side: DocumentSide = DocumentSide(namespace.side)
+    def_ministry: bool = namespace.def_ministry
+    change_list: bool = namespace.change_list
+    approvement_list: bool = namespace.approvement_list
+
+    # the same restrictions as in the graphical interface
+    if document_mode == DocumentMode.TYPO:
+        if document_side != DocumentSide.MIRROR or def_ministry or change_list or approvement_list:
+            logger.warning("Для типографского вида опции --side, --def-ministry, --change-list и "
+                           "--approvement-list не используются")
+
+        document_side = DocumentSide.MIRROR
+        def_ministry = change_list = approvement_list = False
+
+    elif document_mode == DocumentMode.PROG and def_ministry:
+        logger.warning("Для программного вида опция --def-ministry не используется")
+        def_ministry = False
+
+    return UserInputValues(path_files, document_mode, document_side, def_ministry, change_list, approvement_list)
+
+
+def run_cli(argv: Sequence[str] | None = None) -> int:
+    """Entrance point of the program without the graphical interface.
+
+    Returns the exit code: 0 if all files are modified, 1 otherwise.
+    """
+    parser: ArgumentParser = _parser()
+    namespace: Namespace = parser.parse_args(argv)
+    console_logging()
+
+    path_files: list[Path] = _iter_paths(namespace.files)
+
+    if not path_files:
+        parser.error("не найдено ни одного файла *.docx или *.docm")
+
+    user_input_values: UserInputValues = _user_input_values(namespace, path_files)
+
+    # the processing modules are imported only if there are files, --help and --version do not need them
+    from docx_modify.batch_processing import default_workers, run_batch
+    from docx_modify.core_elements.parallel_deflate import parallel_deflate
+    from docx_modify.instrumentation import instrumentation
+    from docx_modify.result_cache import result_cache
+
+    if namespace.no_cache:
+        result_cache.configure(0)
+
+    if namespace.metrics is not None:
+        instrumentation.configure(namespace.metrics)
+
+    if namespace.zip_threads is not None:
+        parallel_deflate.configure(threads=max(namespace.zip_threads, 1))
+
+    if namespace.compression is not None:
+        parallel_deflate.configure(compression=CompressionProfile(namespace.compression))
+
+    if namespace.workers is None:
+        workers: int = default_workers()
+
+    elif namespace.workers <= 0:
+        workers: int = cpu_count() or 1
+
+    else:
+        workers: int = namespace.workers
+
+    file_results: list[FileResult] = run_batch(user_input_values, workers, not namespace.on_disk, namespace.stream)
+
+    _failed: int = sum(not file_result.success for file_result in file_results)
+    logger.success(f"Обработано файлов: {len(file_results) - _failed}, с ошибками: {_failed}")
+
+    return 0 if not _failed else 1
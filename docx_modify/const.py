@@ -1,12 +1,10 @@
 # -*- coding: utf-8 -*-
+from functools import lru_cache
+from os import getenv
 from pathlib import Path
 from typing import TypeAlias, Literal, Any
 
-try:
-    from tomllib import load
-except ModuleNotFoundError:
-    # noinspection PyUnresolvedReferences
-    from tomli import load
+XML_DECLARATION: str = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
 
 _MIRROR_ARCH_FORMULA: str = """\
 <w:p xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">
@@ -80,7 +78,26 @@ TriState: TypeAlias = bool | None
 HeaderFooter: TypeAlias = Literal["header", "footer"]
 
 
-def version():
+def temp_root() -> Path:
+    """The directory to create the temp workspaces in, may be set by the DOCX_MODIFY_TEMP variable."""
+    return Path(getenv("DOCX_MODIFY_TEMP", temp_path))
+
+
+def cache_root() -> Path:
+    """The directory of the result cache, may be set by the DOCX_MODIFY_CACHE variable."""
+    _default: Path = Path(getenv("LOCALAPPDATA") or getenv("XDG_CACHE_HOME") or Path.home().joinpath(".cache"))
+    return Path(getenv("DOCX_MODIFY_CACHE", _default.joinpath("docx_modify")))
+
+
+@lru_cache(maxsize=None)
+def version() -> str:
+    """The version of the program, pyproject.toml is read once per process."""
+    try:
+        from tomllib import load
+    except ModuleNotFoundError:
+        # noinspection PyUnresolvedReferences
+        from tomli import load
+
     with open(parent_path.joinpath("pyproject.toml"), "rb") as f:
         content: dict[str, Any] = load(f)
 
@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
+from functools import lru_cache
+
 from lxml import etree
 from lxml.etree import QName
 
-__all__ = ["fqdn", "register_ns"]
+__all__ = ["fqdn", "namespace", "register_ns"]
 
 _ns: dict[str, str] = {
     "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
@@ -75,12 +77,18 @@ def _qn(tag: str) -> tuple[str, str]:
     return uri, tagroot
 
 
-def fqdn(tag: str) -> QName | str:
+@lru_cache(maxsize=None)
+def fqdn(tag: str) -> str:
+    """Converts the prefixed name to the Clark one, the result is cached for each name."""
     if "{" not in tag and ":" not in tag:
         return tag
 
     else:
-        return QName(*_qn(tag))
+        return QName(*_qn(tag)).text
+
+
+def namespace(prefix: str) -> str | None:
+    return _ns.get(prefix)
 
 
 def register_ns():
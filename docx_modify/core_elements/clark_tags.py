@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""The Clark names of the tags and attributes used in the loops, resolved once on import."""
+from docx_modify.core_elements.clark_name import fqdn, namespace
+
+NS_W: str = namespace("w")
+NS_CT: str = "http://schemas.openxmlformats.org/package/2006/content-types"
+
+W_FOOTER_REFERENCE: str = fqdn("w:footerReference")
+W_HEADER_REFERENCE: str = fqdn("w:headerReference")
+W_PG_SZ: str = fqdn("w:pgSz")
+W_SECT_PR: str = fqdn("w:sectPr")
+W_STYLE: str = fqdn("w:style")
+
+R_ID: str = fqdn("r:id")
+W_ORIENT: str = fqdn("w:orient")
+W_STYLE_ID: str = fqdn("w:styleId")
+W_TYPE: str = fqdn("w:type")
+W_VAL: str = fqdn("w:val")
+
+CT_DEFAULT: str = f"{{{NS_CT}}}Default"
+CT_OVERRIDE: str = f"{{{NS_CT}}}Override"
@@ -1,20 +1,21 @@
 # -*- coding: utf-8 -*-
 from pathlib import Path
-from shutil import copy2
+from tempfile import mkdtemp
 
 from loguru import logger
 
-from docx_modify.const import temp_path
+from docx_modify.const import temp_root
 from docx_modify.core_elements.clark_name import register_ns
 from docx_modify.core_elements.updated_zip_file import PathLike
 
 
 class CoreDocument:
-    def __init__(self, path: PathLike):
+    def __init__(self, path: PathLike, path_dir: Path | None = None):
         if isinstance(path, str):
             path: Path = Path(path).resolve()
         self._path: Path = path
-        self.path_dir: Path = temp_path.joinpath("_docx_temp")
+        self.path_dir: Path | None = path_dir
+        self._path_output: Path | None = None
         self._name_updated: str | None = None
         register_ns()
 
@@ -49,6 +50,14 @@ class CoreDocument:
     def path(self, value):
         self._path = value
 
+    def make_workspace(self) -> Path:
+        """Creates the temp directory used only by the current document."""
+        _root: Path = temp_root()
+        _root.mkdir(parents=True, exist_ok=True)
+        self.path_dir = Path(mkdtemp(prefix="_docx_temp_", dir=_root))
+        logger.info(f"Создана временная директория {self.path_dir}")
+        return self.path_dir
+
     def _new_name(self, name: str) -> Path:
         return self._path.with_stem(f"{self._path.stem}_{name}")
 
@@ -64,24 +73,19 @@ class CoreDocument:
             logger.warning(f"Проверка имени {name}_new ...")
             return self._prepare_file(f"{name}_new")
 
-    def duplicate(self, name: str):
+    def set_output(self, name: str):
+        """Specifies the new file, the original one is not changed.
+
+        The new file is created only when the archive is packed.
+        """
         _new_file: Path = self._prepare_file(name)
+        self._path_output = _new_file
         self._name_updated = f"{_new_file}"
-        _origin_file_name: Path = self._path
-
-        try:
-            self._path.rename(_new_file)
-            self._path = _new_file
-            copy2(self._path, _origin_file_name)
 
-        except PermissionError as e:
-            logger.error(f"Файл {self._path.name} не может быть переименован в {_new_file.name}")
-            logger.error(f"{e.__class__.__name__}, {e.strerror}")
-            raise
-
-        except OSError as e:
-            logger.error(f"{e.__class__.__name__}, {e.strerror}")
-            raise
+    @property
+    def path_output(self) -> Path:
+        """The file to save the changes to, the original one if no new file is specified."""
+        return self._path_output if self._path_output is not None else self._path
 
     @property
     def name_updated(self):
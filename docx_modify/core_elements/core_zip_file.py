@@ -1,13 +1,18 @@
 # -*- coding: utf-8 -*-
 from functools import cached_property
-from glob import iglob
 from pathlib import Path
 
 from loguru import logger
+from lxml import etree
+# noinspection PyProtectedMember
+from lxml.etree import _ElementTree
 
+from docx_modify.const import XML_DECLARATION
 from docx_modify.core_elements.core_document import CoreDocument
-from docx_modify.core_elements.updated_zip_file import PathLike, UpdatedZipFile
+from docx_modify.core_elements.updated_zip_file import PathLike, UpdatedZipFile, part_name
+from docx_modify.core_elements.xml_parser import parse_xml
 from docx_modify.exceptions import FileNotInArchiveError
+from docx_modify.instrumentation import instrumentation
 
 
 class UnzippedFile:
@@ -66,10 +71,14 @@ class UnzippedFile:
 
 
 class CoreZipFile:
-    def __init__(self, core_document: CoreDocument):
+    def __init__(self, core_document: CoreDocument, in_memory: bool = False):
         self._core_document: CoreDocument = core_document
-        self.__updated_zip_file: UpdatedZipFile = UpdatedZipFile(core_document.path, core_document.path_dir)
+        self.__updated_zip_file: UpdatedZipFile = UpdatedZipFile(
+            core_document.path, core_document.path_dir, in_memory, core_document.path_output)
         self._is_zipped: bool = True
+        # the parsed XML parts shared by all processing stages
+        self._trees: dict[str, _ElementTree] = {}
+        self._dirty: set[str] = set()
 
     def __repr__(self):
         return f"<{self.__class__.__name__}({self.path})>, {repr(self.__updated_zip_file)}, {self._is_zipped}"
@@ -78,6 +87,7 @@ class CoreZipFile:
         return f"{self.__class__.__name__}: {self.path}, {str(self.__updated_zip_file)}"
 
     def copy(self, name_from: PathLike, name_to: PathLike):
+        self._discard_tree(name_to)
         return self.__updated_zip_file.copy_file(name_from, name_to)
 
     @property
@@ -88,20 +98,96 @@ class CoreZipFile:
         return self.__updated_zip_file.unarchive()
 
     def delete(self, name: PathLike):
+        self._discard_tree(name)
         self.__updated_zip_file.delete_file(name)
 
     def delete_temp_archive(self):
+        if not self.__updated_zip_file.is_zipped:
+            self.__updated_zip_file.archive(self._pop_trees())
+
         return self.__updated_zip_file.delete_temp_archive()
 
+    def iter_files(self, pattern: str) -> list[str]:
+        """The names of the files matching the pattern, the wildcards do not match "/"."""
+        return self.__updated_zip_file.iter_files(pattern)
+
     def delete_files(self, pattern: str):
-        for file in iglob(pattern, root_dir=self.path_dir, recursive=False):
+        for file in self.iter_files(pattern):
             self.delete(file)
             logger.info(f"Файл {file} удален")
 
+    def exists(self, name: PathLike) -> bool:
+        return self.__updated_zip_file.exists(name)
+
+    def read_file(self, name: PathLike) -> bytes | None:
+        if part_name(name) in self._dirty:
+            self._save_tree(part_name(name))
+
+        return self.__updated_zip_file.read_file(name)
+
+    def modify_file(self, name: PathLike, content: bytes):
+        self._discard_tree(name)
+        return self.__updated_zip_file.modify_file(name, content)
+
+    def rewrite_file(self, name: PathLike):
+        """Streams the file to its new content, see UpdatedZipFile.rewrite_file."""
+        if part_name(name) in self._dirty:
+            self._save_tree(part_name(name))
+
+        self._discard_tree(name)
+        return self.__updated_zip_file.rewrite_file(name)
+
+    def read_tree(self, name: PathLike) -> _ElementTree | None:
+        """Parses the XML part only once, the next calls return the same tree."""
+        _name: str = part_name(name)
+
+        if _name not in self._trees:
+            content: bytes | None = self.__updated_zip_file.read_file(_name)
+
+            if content is None:
+                return None
+
+            self._trees[_name] = parse_xml(content, _name)
+            instrumentation.count("parsed")
+            logger.debug(f"Файл {_name} разобран")
+
+        return self._trees.get(_name)
+
+    def write_tree(self, name: PathLike, element_tree: _ElementTree):
+        """Marks the XML part as modified, it is serialized only before archiving."""
+        _name: str = part_name(name)
+        self._trees[_name] = element_tree
+        self._dirty.add(_name)
+
+    def _save_tree(self, name: str):
+        content: bytes = etree.tostring(self._trees.get(name), encoding="utf-8", doctype=XML_DECLARATION)
+        self.__updated_zip_file.modify_file(name, content)
+        self._dirty.discard(name)
+        instrumentation.count("serialized")
+        logger.debug(f"Файл {name} записан")
+
+    def _pop_trees(self) -> dict[str, _ElementTree]:
+        """The modified trees to serialize straight into the new archive.
+
+        The cache is dropped, so the archived document holds no parsed XML.
+        """
+        trees: dict[str, _ElementTree] = {name: self._trees.get(name) for name in sorted(self._dirty)}
+        self._trees.clear()
+        self._dirty.clear()
+        return trees
+
+    def _discard_tree(self, name: PathLike):
+        _name: str = part_name(name)
+        self._trees.pop(_name, None)
+        self._dirty.discard(_name)
+
+    @property
+    def in_memory(self) -> bool:
+        return self.__updated_zip_file.in_memory
+
     def __getitem__(self, item):
         if item in self:
-            _index: int = self.files.index(item)
-            return self.files[_index]
+            return part_name(item)
 
         elif item in self.unzipped_files:
             return self.unzipped_files.get(item)
@@ -114,7 +200,7 @@ class CoreZipFile:
         return iter(self.files)
 
     def __contains__(self, item):
-        return item in iter(self)
+        return self.exists(item)
 
     def __len__(self):
         return len(self.files)
@@ -134,8 +220,16 @@ class CoreZipFile:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.__updated_zip_file.__exit__(exc_type, exc_val, exc_tb)
-        self.__updated_zip_file.close()
+        try:
+            if exc_type is None and not self.__updated_zip_file.is_zipped:
+                self.__updated_zip_file.archive(self._pop_trees())
+
+        finally:
+            # the trees are not required after the failure as well
+            self._trees.clear()
+            self._dirty.clear()
+            self.__updated_zip_file.__exit__(exc_type, exc_val, exc_tb)
+            self.__updated_zip_file.close()
 
     @property
     def path(self):
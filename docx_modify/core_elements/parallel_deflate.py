@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from os import cpu_count, getenv
+from typing import BinaryIO, NamedTuple
+from zipfile import ZIP_DEFLATED, ZIP_STORED
+from zlib import DEFLATED, Z_FINISH, Z_SYNC_FLUSH, compressobj, crc32
+
+from loguru import logger
+
+from docx_modify.enum_element import CompressionProfile
+
+__all__ = [
+    "CompressedMember", "DeflateStream", "ParallelDeflate", "PendingMember", "default_compression",
+    "default_zip_threads", "parallel_deflate"]
+
+# the size of the chunk compressed by a thread, it does not depend on the number of the threads,
+# so the archive is the same byte by byte whatever the number is
+_CHUNK_SIZE: int = 1 << 20
+# the window of the deflate, the tail of the previous chunk is the dictionary of the next one
+_WINDOW_SIZE: int = 1 << 15
+
+
+def default_zip_threads() -> int:
+    """The number of the threads to compress the archive, may be set by the DOCX_MODIFY_ZIP_THREADS variable.
+
+    By default, the number of the CPU cores, but not more than 4.
+    """
+    _threads: str | None = getenv("DOCX_MODIFY_ZIP_THREADS", None)
+
+    if _threads is None:
+        return min(cpu_count() or 1, 4)
+
+    try:
+        threads: int = int(_threads)
+
+    except ValueError:
+        logger.warning(f"Некорректное число потоков сжатия {_threads}, архив сжимается в одном потоке")
+        return 1
+
+    return max(threads, 1)
+
+
+def default_compression() -> CompressionProfile:
+    """The compression profile, may be set by the DOCX_MODIFY_COMPRESSION variable: fast, default or small."""
+    _compression: str = getenv("DOCX_MODIFY_COMPRESSION", CompressionProfile.DEFAULT.value)
+
+    try:
+        return CompressionProfile(_compression)
+
+    except ValueError:
+        logger.warning(f"Некорректный профиль сжатия {_compression}, используется default")
+        return CompressionProfile.DEFAULT
+
+
+def _deflate_chunk(chunk: bytes | memoryview, zdict: bytes, level: int, last: bool) -> bytes:
+    if zdict:
+        compressor = compressobj(level, DEFLATED, -15, zdict=zdict)
+
+    else:
+        compressor = compressobj(level, DEFLATED, -15)
+
+    # the chunks but the last one end on the byte boundary, so the concatenation is one deflate stream
+    return compressor.compress(chunk) + compressor.flush(Z_FINISH if last else Z_SYNC_FLUSH)
+
+
+class CompressedMember(NamedTuple):
+    """The content of the archive member compressed as the raw deflate stream or stored as is.
+
+    Attributes:
+        chunks (list[bytes]): The compressed chunks in the order of the content
+        crc (int): The CRC-32 of the content
+        file_size (int): The size of the content in bytes
+        compress_type (int): ZIP_DEFLATED or ZIP_STORED
+    """
+    chunks: list[bytes]
+    crc: int
+    file_size: int
+    compress_type: int = ZIP_DEFLATED
+
+    def __str__(self):
+        return f"{self.__class__.__name__}: {self.file_size} -> {self.compress_size}"
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({self.crc}, {self.file_size}, {self.compress_size})>"
+
+    @property
+    def compress_size(self) -> int:
+        return sum(len(chunk) for chunk in self.chunks)
+
+
+class PendingMember(NamedTuple):
+    """The member being compressed, the futures of its chunks and CRC."""
+    chunks: list[Future]
+    crc: Future
+    file_size: int
+    compress_type: int = ZIP_DEFLATED
+
+
+class ParallelDeflate:
+    """The deflate of the archive members split into the chunks compressed by the threads.
+
+    zlib releases the GIL, so the chunks of the large parts, e.g. word/document.xml, are compressed
+    at the same time. The member is compressed as soon as it is submitted, the result is waited for
+    only when the member is written. If the number of the threads is 1, the chunks are compressed
+    in the calling thread.
+
+    The level of the deflate is set by the compression profile, the fast one stores the compressed media as is.
+    """
+
+    def __init__(self, threads: int, compression: CompressionProfile = CompressionProfile.DEFAULT):
+        self._threads: int = threads
+        self._compression: CompressionProfile = compression
+        self._executor: Executor | None = None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({self._threads}, {self._compression.value})>"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}: потоков {self._threads}, сжатие {self._compression.value}"
+
+    @property
+    def threads(self) -> int:
+        return self._threads
+
+    @property
+    def compression(self) -> CompressionProfile:
+        return self._compression
+
+    def configure(self, threads: int | None = None, compression: CompressionProfile | None = None):
+        if compression is not None:
+            self._compression = compression
+
+        if threads is None or threads == self._threads:
+            return
+
+        self.shutdown()
+        self._threads = threads
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _submit(self, func, *args) -> Future:
+        if self._threads <= 1:
+            future: Future = Future()
+            future.set_result(func(*args))
+            return future
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self._threads, thread_name_prefix="docx_modify_deflate")
+
+        return self._executor.submit(func, *args)
+
+    def submit(self, name: str, content: bytes) -> PendingMember:
+        """Starts compressing the member, the result is returned by result()."""
+        data: memoryview = memoryview(content)
+
+        if self._compression.is_stored(name):
+            chunk: Future = Future()
+            chunk.set_result(content)
+            return PendingMember([chunk], self._submit(crc32, data), len(data), ZIP_STORED)
+
+        chunks: list[Future] = [
+            self._submit(
+                _deflate_chunk,
+                data[start:start + _CHUNK_SIZE],
+                bytes(data[max(start - _WINDOW_SIZE, 0):start]),
+                self._compression.level,
+                start + _CHUNK_SIZE >= len(data))
+            for start in range(0, max(len(data), 1), _CHUNK_SIZE)]
+        return PendingMember(chunks, self._submit(crc32, data), len(data))
+
+    @staticmethod
+    def result(pending_member: PendingMember) -> CompressedMember:
+        return CompressedMember(
+            [future.result() for future in pending_member.chunks],
+            pending_member.crc.result(),
+            pending_member.file_size,
+            pending_member.compress_type)
+
+    def compress(self, name: str, content: bytes) -> CompressedMember:
+        return self.result(self.submit(name, content))
+
+    def stream(self, name: str, target: BinaryIO) -> 'DeflateStream':
+        """The file-like object to compress the member written to it part by part."""
+        return DeflateStream(self, target, self._compression.is_stored(name))
+
+
+class DeflateStream:
+    """The file-like object compressing the content written to it into the target.
+
+    The content is split into the same chunks as ParallelDeflate.submit does, so the compressed data
+    is the same byte by byte. The chunks are written to the target in the order as soon as they are
+    compressed, so only a few chunks are kept in memory whatever the size of the content.
+    """
+
+    def __init__(self, deflate: ParallelDeflate, target: BinaryIO, stored: bool = False):
+        self._deflate: ParallelDeflate = deflate
+        self._target: BinaryIO = target
+        self._stored: bool = stored
+        self._buffer: bytearray = bytearray()
+        self._zdict: bytes = b""
+        self._pending: deque[Future] = deque()
+        self.crc: int = 0
+        self.file_size: int = 0
+        self.compress_size: int = 0
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({self.file_size}, {self.compress_size})>"
+
+    @property
+    def compress_type(self) -> int:
+        return ZIP_STORED if self._stored else ZIP_DEFLATED
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        self.crc = crc32(data, self.crc)
+        self.file_size += len(data)
+
+        # the last chunk is kept, it is compressed with Z_FINISH on closing
+        while len(self._buffer) > _CHUNK_SIZE:
+            self._submit(bytes(self._buffer[:_CHUNK_SIZE]), False)
+            del self._buffer[:_CHUNK_SIZE]
+
+        return len(data)
+
+    def _submit(self, chunk: bytes, last: bool):
+        if self._stored:
+            future: Future = Future()
+            future.set_result(chunk)
+
+        else:
+            # noinspection PyProtectedMember
+            future: Future = self._deflate._submit(
+                _deflate_chunk, chunk, self._zdict, self._deflate.compression.level, last)
+            self._zdict = chunk[-_WINDOW_SIZE:]
+
+        self._pending.append(future)
+
+        # the threads are kept busy, the compressed chunks are written as soon as possible
+        while len(self._pending) > self._deflate.threads:
+            self._write_pending()
+
+    def _write_pending(self):
+        compressed: bytes = self._pending.popleft().result()
+        self._target.write(compressed)
+        self.compress_size += len(compressed)
+
+    def close(self):
+        """Compresses the rest of the content and writes all chunks."""
+        self._submit(bytes(self._buffer), True)
+        self._buffer.clear()
+
+        while self._pending:
+            self._write_pending()
+
+
+parallel_deflate: ParallelDeflate = ParallelDeflate(default_zip_threads(), default_compression())
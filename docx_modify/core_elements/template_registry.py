@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+from copy import deepcopy
+from hashlib import sha256
+from pathlib import Path
+
+from loguru import logger
+# noinspection PyProtectedMember
+from lxml.etree import ElementBase, _ElementTree
+
+from docx_modify.const import parent_path
+from docx_modify.core_elements.clark_tags import W_STYLE, W_STYLE_ID
+from docx_modify.core_elements.updated_zip_file import PathLike, part_name
+from docx_modify.core_elements.xml_parser import parse_xml
+
+__all__ = ["TemplateRegistry", "templates"]
+
+
+class TemplateRegistry:
+    """The files of the sources directory read and parsed once per process.
+
+    The names are relative to the root directory, e.g. "styles/styles.xml".
+    The parsed trees are never given away, only their deep copies.
+    """
+
+    def __init__(self, root: Path):
+        self._root: Path = root
+        self._contents: dict[str, bytes] = {}
+        self._trees: dict[str, _ElementTree] = {}
+        self._names: dict[str, tuple[str, ...]] = {}
+        self._fingerprint: str | None = None
+        self._style_ids: dict[str, tuple[str, ...]] = {}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({self._root})>"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}: {self._root}, файлов загружено: {len(self._contents)}"
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def _key(self, name: PathLike) -> str:
+        if Path(name).is_absolute():
+            name: Path = Path(name).relative_to(self._root)
+
+        return part_name(name)
+
+    def read_bytes(self, name: PathLike) -> bytes:
+        _name: str = self._key(name)
+
+        if _name not in self._contents:
+            self._contents[_name] = self._root.joinpath(_name).read_bytes()
+            logger.debug(f"Шаблон {_name} загружен")
+
+        return self._contents.get(_name)
+
+    def _tree(self, name: PathLike) -> _ElementTree:
+        _name: str = self._key(name)
+
+        if _name not in self._trees:
+            self._trees[_name] = parse_xml(self.read_bytes(_name))
+
+        return self._trees.get(_name)
+
+    def root_element(self, name: PathLike) -> ElementBase:
+        """The copy of the root element of the template."""
+        return deepcopy(self._tree(name).getroot())
+
+    def children(self, name: PathLike) -> list[ElementBase]:
+        """The copies of the child elements of the template root."""
+        return [deepcopy(child) for child in self._tree(name).getroot().iterchildren()]
+
+    def style_ids(self, name: PathLike) -> tuple[str, ...]:
+        """The ids of the styles of the template, the root children only."""
+        _name: str = self._key(name)
+
+        if _name not in self._style_ids:
+            self._style_ids[_name] = tuple(
+                child.get(W_STYLE_ID) for child in self._tree(_name).getroot().iterchildren(W_STYLE))
+
+        return self._style_ids.get(_name)
+
+    def names(self, folder: PathLike) -> tuple[str, ...]:
+        """The names of the files in the template folder."""
+        _folder: str = self._key(folder)
+
+        if _folder not in self._names:
+            self._names[_folder] = tuple(sorted(
+                path.name for path in self._root.joinpath(_folder).iterdir() if path.is_file()))
+
+        return self._names.get(_folder)
+
+    def fingerprint(self) -> str:
+        """The hash of the names and contents of all templates, it changes if any template is changed."""
+        if self._fingerprint is None:
+            _hash = sha256()
+
+            for path in sorted(self._root.rglob("*")):
+                if path.is_file():
+                    _name: str = self._key(path)
+                    content: bytes = self.read_bytes(_name)
+                    _hash.update(f"{_name}\0{len(content)}\0".encode("utf-8"))
+                    _hash.update(content)
+
+            self._fingerprint = _hash.hexdigest()
+
+        return self._fingerprint
+
+    def warm_up(self):
+        """Loads all templates in advance, the XML ones are also parsed."""
+        for path in sorted(self._root.rglob("*")):
+            if not path.is_file():
+                continue
+
+            _name: str = self._key(path)
+            self.read_bytes(_name)
+
+            if path.suffix in (".xml", ".rels"):
+                self._tree(_name)
+
+        for path in self._root.rglob("*"):
+            if path.is_dir():
+                self.names(path)
+
+        logger.debug(str(self))
+
+    def clear(self):
+        self._contents.clear()
+        self._trees.clear()
+        self._names.clear()
+        self._style_ids.clear()
+        self._fingerprint = None
+
+
+templates: TemplateRegistry = TemplateRegistry(parent_path.joinpath("sources"))
@@ -1,28 +1,91 @@
 # -*- coding: utf-8 -*-
-from os import walk
+from contextlib import contextmanager
+from copy import copy
+from fnmatch import fnmatchcase
+from io import SEEK_CUR, BytesIO
+from os import replace, walk
 from pathlib import Path
 from shutil import rmtree
-from typing import TypeAlias
-from zipfile import ZIP_DEFLATED, ZipFile
+from struct import unpack
+from time import localtime, time
+from typing import BinaryIO, Callable, Collection, Iterable, Iterator, Mapping, TypeAlias
+from zipfile import (
+    ZIP64_LIMIT, ZIP_DEFLATED, BadZipFile, LargeZipFile, ZipFile, ZipInfo, sizeFileHeader, stringFileHeader)
 
 from loguru import logger
+# noinspection PyProtectedMember
+from lxml.etree import _ElementTree
 
+from docx_modify.const import XML_DECLARATION
+from docx_modify.core_elements.parallel_deflate import CompressedMember, DeflateStream, PendingMember, parallel_deflate
 from docx_modify.exceptions import FileNotInArchiveError, ZipFileUnzippedError, ZipFileZippedError
+from docx_modify.instrumentation import instrumentation
 
 PathLike: TypeAlias = str | Path
+# the content of the member to write: the bytes, the tree, the file or None to copy from the source archive
+Member: TypeAlias = tuple[ZipInfo, bytes | _ElementTree | Path] | None
+
+# the modified tree may grow, so the ZIP64 header is reserved for the parts half as large as the limit
+_ZIP64_HINT: int = ZIP64_LIMIT // 2
+# the size of the block read from the unpacked file
+_READ_SIZE: int = 1 << 20
+
+
+def part_name(name: PathLike) -> str:
+    """Converts the path inside the archive to the ZIP member name."""
+    if isinstance(name, Path):
+        return name.as_posix()
+
+    else:
+        return name.replace("\\", "/")
+
+
+def _new_zip_info(name: str, date_time: tuple[int, ...]) -> ZipInfo:
+    # the same attributes as ZipFile.writestr sets
+    zip_info: ZipInfo = ZipInfo(name, date_time)
+    zip_info.external_attr = 0o600 << 16
+    return zip_info
+
+
+def _strip_zip64(extra: bytes) -> bytes:
+    """Removes the ZIP64 extra field, it is written again if required."""
+    _extra: bytearray = bytearray()
+    index: int = 0
+
+    while index + 4 <= len(extra):
+        header_id, size = unpack("<2H", extra[index:index + 4])
+
+        if header_id != 1:
+            _extra += extra[index:index + 4 + size]
+
+        index += 4 + size
+
+    return bytes(_extra)
 
 
 class UpdatedZipFile:
-    def __init__(self, path: PathLike, path_dir: Path | None = None):
+    def __init__(
+            self,
+            path: PathLike,
+            path_dir: Path | None = None,
+            in_memory: bool = False,
+            path_output: PathLike | None = None):
         if isinstance(path, str):
             path: Path = Path(path)
-        if path_dir is None:
-            path_dir: Path = Path.home().joinpath("Desktop").joinpath("_docx_temp")
+
+        if path_output is None:
+            path_output: Path = path
 
         self._path: Path = path
+        self._path_output: Path = Path(path_output)
         self._zip_file: ZipFile | None = None
         self._is_zipped: bool = True
-        self._path_dir: Path = path_dir
+        self._path_dir: Path | None = path_dir
+        self._in_memory: bool = in_memory
+        # None is for the part not changed, it is read from the source archive on demand
+        self._parts: dict[str, bytes | None] = {}
+        self._modified: set[str] = set()
+        self._manifest: dict[str, ZipInfo] | None = None
 
     def __repr__(self):
         return f"<{self.__class__.__name__}({self._path})>"
@@ -58,21 +121,62 @@ class UpdatedZipFile:
     def is_zipped(self, value):
         self._is_zipped = value
 
+    @property
+    def in_memory(self):
+        return self._in_memory
+
+    @property
+    def manifest(self) -> dict[str, ZipInfo]:
+        """The members of the package by name.
+
+        The central directory is read only once, then the manifest is updated along with the parts.
+        """
+        if self._manifest is None:
+            if self._zip_file is not None and self._zip_file.fp is not None:
+                zip_infos: list[ZipInfo] = self._zip_file.infolist()
+
+            else:
+                with ZipFile(self._path) as zf:
+                    zip_infos: list[ZipInfo] = zf.infolist()
+
+            self._manifest = {zip_info.filename: zip_info for zip_info in zip_infos}
+
+        return self._manifest
+
+    def _add_member(self, name: str):
+        if name not in self.manifest:
+            self.manifest[name] = ZipInfo(name)
+
+    def _delete_member(self, name: str):
+        self.manifest.pop(name, None)
+
     @property
     def files(self) -> list[str]:
-        return self.reader().zip_file.namelist()
+        return [*self.manifest]
 
     def full_name(self, name: PathLike) -> Path:
         return self._path_dir.joinpath(name)
 
     def reader(self) -> '_UpdatedZipFileReader':
-        return _UpdatedZipFileReader(self._path)
+        return _UpdatedZipFileReader(self._path, self._path_dir)
+
+    @property
+    def path_output(self) -> Path:
+        return self._path_output
+
+    @property
+    def temp_path(self) -> Path:
+        """The file to write the archive to, it is moved to the output path only after writing.
+
+        It is in the same directory, so the output file is replaced atomically.
+        """
+        return self._path_output.with_name(f"{self._path_output.name}.tmp")
 
     def writer(self) -> '_UpdatedZipFileWriter':
-        return _UpdatedZipFileWriter(self._path)
+        return _UpdatedZipFileWriter(self.temp_path, self._path_dir)
 
     def zip_file_manager(self) -> '_UpdatedZipFileManager':
-        return _UpdatedZipFileManager(self._path)
+        return _UpdatedZipFileManager(self._path, self._path_dir)
 
     def unarchive(self):
         self._zip_file = self.reader().zip_file
@@ -82,25 +186,133 @@ class UpdatedZipFile:
             raise ZipFileUnzippedError
 
         self.is_zipped = False
-        return self.reader().unarchive()
+        self._modified.clear()
 
-    def archive(self):
+        if self._in_memory:
+            self._parts = dict.fromkeys(self._zip_file.namelist())
+            return
+
+        self._path_dir.mkdir(exist_ok=True)
+        self._zip_file.extractall(self._path_dir)
+
+        _size: int = sum(zip_info.file_size for zip_info in self._zip_file.infolist())
+        instrumentation.count("read", _size)
+        instrumentation.count("written", _size)
+
+    def archive(self, trees: Mapping[str, _ElementTree] | None = None):
+        """Packs the new archive, the trees are serialized straight into their members."""
         if self.is_zipped:
             logger.error("ZIP-архив уже запакован")
             raise ZipFileZippedError
 
         self.is_zipped = True
-        return self.writer().archive()
+
+        if trees is None:
+            trees: dict[str, _ElementTree] = {}
+
+        for name in trees:
+            self._add_member(name)
+
+        # the source archive is still required to copy the parts not changed
+        try:
+            if self._in_memory:
+                self.writer().write_all(self._parts, self._zip_file, trees)
+
+            else:
+                self.writer().archive(self._zip_file, self._modified, trees)
+
+        except BaseException:
+            self.temp_path.unlink(missing_ok=True)
+            raise
+
+        self._zip_file.close()
+        instrumentation.count("written", self.temp_path.stat().st_size)
+        replace(self.temp_path, self._path_output)
+
+    def exists(self, name: PathLike) -> bool:
+        return part_name(name) in self.manifest
+
+    def iter_files(self, pattern: str) -> list[str]:
+        # the same semantics as glob: the wildcard does not cross the directory separator
+        return [
+            name for name in self.manifest
+            if fnmatchcase(name, pattern) and name.count("/") == pattern.count("/")]
+
+    def read_file(self, name: PathLike) -> bytes | None:
+        if self._in_memory:
+            _name: str = part_name(name)
+
+            if _name in self._parts and self._parts.get(_name) is None:
+                content: bytes = self._zip_file.read(_name)
+                instrumentation.count("read", len(content))
+                return content
+
+            return self._parts.get(_name)
+
+        return self.zip_file_manager().read_file(name)
 
     def copy_file(self, name_from: PathLike, name_to: PathLike):
+        self._add_member(part_name(name_to))
+
+        if self._in_memory:
+            with open(name_from, "rb") as fb:
+                self._parts[part_name(name_to)] = fb.read()
+
+            instrumentation.count("read", len(self._parts.get(part_name(name_to))))
+            return
+
+        self._modified.add(part_name(name_to))
         return self.zip_file_manager().copy_file(name_from, name_to)
 
     def delete_file(self, name: PathLike):
+        self._delete_member(part_name(name))
+
+        if self._in_memory:
+            self._parts.pop(part_name(name), None)
+            return
+
         return self.zip_file_manager().delete_file(name)
 
     def modify_file(self, name: PathLike, content: bytes):
+        self._add_member(part_name(name))
+
+        if self._in_memory:
+            self._parts[part_name(name)] = content
+            return
+
+        self._modified.add(part_name(name))
         return self.zip_file_manager().modify_file(name, content)
 
+    @contextmanager
+    def rewrite_file(self, name: PathLike) -> Iterator[tuple[BinaryIO, BinaryIO]]:
+        """Opens the file to read and the stream for its new content.
+
+        The new content replaces the file only if no error occurs.
+        """
+        _name: str = part_name(name)
+
+        if self._in_memory:
+            target: BytesIO = BytesIO()
+            yield BytesIO(self.read_file(_name)), target
+            self._parts[_name] = target.getvalue()
+            return
+
+        self._modified.add(_name)
+        full_name: Path = self.full_name(_name)
+        temp_name: Path = full_name.with_name(f"{full_name.name}.tmp")
+
+        try:
+            with open(full_name, "rb") as source, open(temp_name, "wb") as target:
+                yield source, target
+
+        except BaseException:
+            temp_name.unlink(missing_ok=True)
+            raise
+
+        instrumentation.count("read", full_name.stat().st_size)
+        instrumentation.count("written", temp_name.stat().st_size)
+        replace(temp_name, full_name)
+
     def rename_file(self, file_name: PathLike, new_name: PathLike):
         return self.zip_file_manager().rename_file(file_name, new_name)
 
@@ -111,7 +323,11 @@ class UpdatedZipFile:
         if not self.is_zipped:
             self.archive()
 
-        rmtree(self._path_dir, True)
+        if self._in_memory:
+            self._parts.clear()
+
+        else:
+            rmtree(self._path_dir, True)
 
     def __enter__(self):
         if self.is_zipped:
@@ -120,15 +336,20 @@ class UpdatedZipFile:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if not self.is_zipped:
+        # the output file appears only after the successful processing
+        if exc_type is None and not self.is_zipped:
             self.archive()
 
         self.close()
+        self.temp_path.unlink(missing_ok=True)
+
+        if not self._in_memory and self._path_dir is not None:
+            rmtree(self._path_dir, True)
 
 
 class _UpdatedZipFileReader(UpdatedZipFile):
-    def __init__(self, path: PathLike):
-        super().__init__(path)
+    def __init__(self, path: PathLike, path_dir: Path | None = None):
+        super().__init__(path, path_dir)
         self._zip_file: ZipFile = ZipFile(self._path, "r", ZIP_DEFLATED)
 
     def read(self, name: PathLike) -> bytes:
@@ -157,36 +378,267 @@ class _UpdatedZipFileReader(UpdatedZipFile):
 
 
 class _UpdatedZipFileWriter(UpdatedZipFile):
-    def __init__(self, path: PathLike):
-        super().__init__(path)
+    def __init__(self, path: PathLike, path_dir: Path | None = None):
+        super().__init__(path, path_dir)
         self._zip_file: ZipFile = ZipFile(self._path, "w", ZIP_DEFLATED)
 
     def write(self, name: PathLike, text: str | bytes):
         if isinstance(name, Path):
             name: str = str(name)
 
-        if name not in self.files:
+        if not self.exists(name):
             logger.error(f"Файл или директория {name} не найдено в архиве")
             raise FileNotInArchiveError
 
         try:
             with self._zip_file as zf:
-                zf.writestr(name, text, ZIP_DEFLATED)
+                zf.writestr(name, text, ZIP_DEFLATED, parallel_deflate.compression.level)
 
         except OSError as e:
             logger.error(f"{e.__class__.__name__}, {e.strerror}")
             raise
 
-    def archive(self):
-        with self._zip_file as zf:
-            for dirpath, _, filenames in walk(self._path_dir):
-                for f in filenames:
-                    filename: Path = Path(dirpath).joinpath(f)
-                    arcname: Path = filename.relative_to(self._path_dir)
-                    zf.write(filename, arcname)
+    def archive(
+            self,
+            source: ZipFile | None = None,
+            modified: Collection[str] = (),
+            trees: Mapping[str, _ElementTree] | None = None):
+        """Packs the directory, the files not modified are copied from the source archive as is.
+
+        The trees replace the files of the same names.
+        """
+        if trees is None:
+            trees: dict[str, _ElementTree] = {}
+
+        _date_time: tuple[int, ...] = localtime(time())[:6]
+        members: dict[str, Member] = {}
+
+        for dirpath, _, filenames in walk(self._path_dir):
+            for f in filenames:
+                filename: Path = Path(dirpath).joinpath(f)
+                arcname: str = part_name(filename.relative_to(self._path_dir))
+
+                if arcname in trees:
+                    members[arcname] = (_new_zip_info(arcname, _date_time), trees.get(arcname))
+
+                elif source is not None and arcname not in modified and arcname in source.NameToInfo:
+                    members[arcname] = None
+
+                else:
+                    members[arcname] = (ZipInfo.from_file(filename, arcname), filename)
+
+        for name in sorted(trees.keys() - members.keys()):
+            members[name] = (_new_zip_info(name, _date_time), trees.get(name))
+
+        self._write_members(members, source)
+
+    def write_all(
+            self,
+            parts: Mapping[str, bytes | None],
+            source: ZipFile | None = None,
+            trees: Mapping[str, _ElementTree] | None = None):
+        """Packs the parts, the ones set to None are copied from the source archive as is.
+
+        The trees replace the parts of the same names.
+        """
+        if trees is None:
+            trees: dict[str, _ElementTree] = {}
+
+        _date_time: tuple[int, ...] = localtime(time())[:6]
+        members: dict[str, Member] = {}
+
+        for name, content in parts.items():
+            if name in trees:
+                members[name] = (_new_zip_info(name, _date_time), trees.get(name))
+
+            elif content is None:
+                members[name] = None
+
+            else:
+                members[name] = (_new_zip_info(name, _date_time), content)
+
+        for name in sorted(trees.keys() - members.keys()):
+            members[name] = (_new_zip_info(name, _date_time), trees.get(name))
+
+        self._write_members(members, source)
+
+    def _write_members(self, members: Mapping[str, Member], source: ZipFile | None):
+        # the bytes are compressed by the threads at once, the trees and files are streamed when written
+        pending: dict[str, tuple[ZipInfo, PendingMember]] = {
+            name: (member[0], parallel_deflate.submit(name, member[1]))
+            for name, member in members.items() if member is not None and isinstance(member[1], bytes)}
+
+        with self._zip_file:
+            for name, member in members.items():
+                if member is None:
+                    self.copy_raw(source, name)
+
+                elif name in pending:
+                    zip_info, pending_member = pending.pop(name)
+                    self.write_compressed(zip_info, parallel_deflate.result(pending_member))
+
+                elif isinstance(member[1], Path):
+                    self.write_file(*member)
+
+                else:
+                    zip_info, element_tree = member
+                    _source: ZipInfo | None = source.NameToInfo.get(name) if source is not None else None
+                    zip64: bool = _source is not None and _source.file_size > _ZIP64_HINT
+                    self.write_tree(zip_info, element_tree, zip64)
+
+    def write_tree(self, zip_info: ZipInfo, element_tree: _ElementTree, zip64: bool = False):
+        """Serializes the tree straight into the member, the whole part is never kept as bytes."""
+        self._write_stream(
+            zip_info, lambda stream: element_tree.write(stream, encoding="utf-8", doctype=XML_DECLARATION), zip64)
+        instrumentation.count("serialized")
+
+    def write_file(self, zip_info: ZipInfo, filename: Path):
+        """Compresses the file block by block, the whole file is never kept in memory."""
+        def _copy(stream: DeflateStream):
+            with open(filename, "rb") as fb:
+                while block := fb.read(_READ_SIZE):
+                    stream.write(block)
+
+        self._write_stream(zip_info, _copy, zip_info.file_size > _ZIP64_HINT)
+        instrumentation.count("read", zip_info.file_size)
+
+    def _write_stream(self, zip_info: ZipInfo, write: Callable[[DeflateStream], None], zip64: bool):
+        """Writes the member, its content is written to the stream by the function.
+
+        The sizes and CRC are known only after the data, so the local header is written again,
+        the same way as ZipFile.open(name, "w") does. It must have the ZIP64 field reserved
+        if the member may exceed 4 GB.
+        """
+        zf: ZipFile = self._zip_file
+        zf.fp.seek(zf.start_dir)
+        zip_info.header_offset = zf.fp.tell()
+        zip_info.flag_bits &= ~0x08
+        # the placeholders are replaced after the data
+        zip_info.CRC = zip_info.file_size = zip_info.compress_size = 0
+        stream: DeflateStream = parallel_deflate.stream(zip_info.filename, zf.fp)
+        zip_info.compress_type = stream.compress_type
+        zf.fp.write(zip_info.FileHeader(zip64))
+
+        write(stream)
+        stream.close()
+
+        zip_info.CRC = stream.crc
+        zip_info.file_size = stream.file_size
+        zip_info.compress_size = stream.compress_size
+
+        if not zip64 and (zip_info.file_size > ZIP64_LIMIT or zip_info.compress_size > ZIP64_LIMIT):
+            logger.error(f"Файл {zip_info.filename} превышает 4 ГБ")
+            raise LargeZipFile
+
+        end: int = zf.fp.tell()
+        zf.fp.seek(zip_info.header_offset)
+        zf.fp.write(zip_info.FileHeader(zip64))
+        zf.fp.seek(end)
+        self._add_to_directory(zip_info)
+        logger.debug(f"Файл {zip_info.filename} записан")
+
+    def write_compressed(self, zip_info: ZipInfo, compressed_member: CompressedMember):
+        """Writes the member compressed beforehand."""
+        zip_info.compress_type = compressed_member.compress_type
+        zip_info.file_size = compressed_member.file_size
+        zip_info.compress_size = compressed_member.compress_size
+        zip_info.CRC = compressed_member.crc
+        self._write_member(zip_info, compressed_member.chunks)
+
+    def copy_raw(self, source: ZipFile, name: str):
+        """Copies the compressed member of the source archive without decompressing it."""
+        zip_info: ZipInfo = source.getinfo(name)
+        source.fp.seek(zip_info.header_offset)
+        header: bytes = source.fp.read(sizeFileHeader)
+
+        if header[:4] != stringFileHeader:
+            logger.error(f"Некорректный заголовок файла {name} в архиве {source.filename}")
+            raise BadZipFile
+
+        name_length, extra_length = unpack("<2H", header[26:30])
+        source.fp.seek(name_length + extra_length, SEEK_CUR)
+
+        _zip_info: ZipInfo = copy(zip_info)
+        _zip_info.extra = _strip_zip64(zip_info.extra)
+        self._write_member(_zip_info, self._iter_raw(source, zip_info))
+        instrumentation.count("read", zip_info.compress_size)
+
+    @staticmethod
+    def _iter_raw(source: ZipFile, zip_info: ZipInfo) -> Iterator[bytes]:
+        remaining: int = zip_info.compress_size
+
+        while remaining > 0:
+            chunk: bytes = source.fp.read(min(remaining, 1 << 20))
+
+            if not chunk:
+                logger.error(f"Файл {zip_info.filename} в архиве {source.filename} поврежден")
+                raise BadZipFile
+
+            yield chunk
+            remaining -= len(chunk)
+
+    def _write_member(self, zip_info: ZipInfo, chunks: Iterable[bytes]):
+        """Writes the local header and the compressed data, the sizes and CRC must be set.
+
+        zipfile has no public API for that, so it is done the same way as ZipFile.open(name, "w") does.
+        """
+        # the sizes and CRC are written in the local header, so no data descriptor follows the data
+        zip_info.flag_bits &= ~0x08
+        zip64: bool = zip_info.file_size > ZIP64_LIMIT or zip_info.compress_size > ZIP64_LIMIT
+
+        zf: ZipFile = self._zip_file
+        zf.fp.seek(zf.start_dir)
+        zip_info.header_offset = zf.fp.tell()
+        zf.fp.write(zip_info.FileHeader(zip64))
+
+        for chunk in chunks:
+            zf.fp.write(chunk)
+
+        self._add_to_directory(zip_info)
+
+    def _add_to_directory(self, zip_info: ZipInfo):
+        # the member is written, it is added to the central directory on closing
+        zf: ZipFile = self._zip_file
+        zf.filelist.append(zip_info)
+        zf.NameToInfo[zip_info.filename] = zip_info
+        zf.start_dir = zf.fp.tell()
+        # noinspection PyProtectedMember
+        zf._didModify = True
 
 
 class _UpdatedZipFileManager(UpdatedZipFile):
+    def read_file(self, name: PathLike) -> bytes | None:
+        full_name: Path = self.full_name(name)
+
+        if not full_name.exists():
+            return None
+
+        try:
+            with open(full_name, "rb") as fb:
+                content: bytes = fb.read()
+
+        except OSError as e:
+            logger.error(f"{e.__class__.__name__}, {e.strerror}")
+            raise
+
+        instrumentation.count("read", len(content))
+        return content
+
+    def modify_file(self, name: PathLike, content: bytes):
+        full_name: Path = self.full_name(name)
+
+        try:
+            full_name.parent.mkdir(parents=True, exist_ok=True)
+
+            with open(full_name, "wb") as fb:
+                fb.write(content)
+
+        except OSError as e:
+            logger.error(f"{e.__class__.__name__}, {e.strerror}")
+            raise
+
+        instrumentation.count("written", len(content))
+
     def delete_file(self, name: PathLike):
         try:
             self.full_name(name).unlink(missing_ok=True)
@@ -204,9 +656,12 @@ class _UpdatedZipFileManager(UpdatedZipFile):
             with open(name_from, "rb") as fb_read:
                 content: bytes = fb_read.read()
 
-            with open(name_to, "wb") as fb_write:
+            with open(self.full_name(name_to), "wb") as fb_write:
                 fb_write.write(content)
 
+            instrumentation.count("read", len(content))
+            instrumentation.count("written", len(content))
+
         except NotADirectoryError | FileNotFoundError | PermissionError as e:
             logger.error(f"{e.__class__.__name__}, {e.strerror}")
             raise
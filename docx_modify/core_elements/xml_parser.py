@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# noinspection PyProtectedMember
+from lxml.etree import XMLParser, _ElementTree, fromstring
+
+from docx_modify.core_elements.updated_zip_file import PathLike, part_name
+
+__all__ = ["parse_xml", "xml_parser"]
+
+# the parts that may contain the text nodes exceeding the libxml2 limit of 10 MB
+_HUGE_PARTS: frozenset[str] = frozenset({"word/document.xml"})
+
+
+def _new_parser(huge_tree: bool) -> XMLParser:
+    # the entities and the network are never resolved, the IDs are never looked up,
+    # the whitespace is kept as the text of w:t may be significant
+    return XMLParser(
+        resolve_entities=False,
+        no_network=True,
+        collect_ids=False,
+        huge_tree=huge_tree,
+        compact=True,
+        remove_comments=False,
+        remove_blank_text=False)
+
+
+_PARSER: XMLParser = _new_parser(False)
+_HUGE_PARSER: XMLParser = _new_parser(True)
+
+
+def xml_parser(name: PathLike | None = None) -> XMLParser:
+    """The shared parser for the part of the archive, the default one if the name is not specified."""
+    if name is not None and part_name(name) in _HUGE_PARTS:
+        return _HUGE_PARSER
+
+    return _PARSER
+
+
+def parse_xml(content: bytes | str, name: PathLike | None = None) -> _ElementTree:
+    """Parses the content of the part with the shared parser."""
+    return fromstring(content, xml_parser(name)).getroottree()
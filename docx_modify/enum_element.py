@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from enum import Enum
 from pathlib import Path
-from typing import Iterable, Iterator, NamedTuple
+from typing import Any, Iterable, Iterator, NamedTuple
 
 from loguru import logger
 from lxml.etree import ElementBase
@@ -376,6 +376,37 @@ class DocumentSide(Enum):
         return f"{self.__class__.__name__}: {self._value_}"
 
 
+# the members already compressed, the deflate does not make them smaller
+_COMPRESSED_SUFFIXES: frozenset[str] = frozenset({
+    ".png", ".jpg", ".jpeg", ".jpe", ".gif", ".webp", ".wdp", ".jxr", ".zip",
+    ".docx", ".docm", ".xlsx", ".xlsm", ".pptx", ".pptm", ".mp3", ".mp4", ".m4a", ".wma", ".wmv"})
+
+
+class CompressionProfile(Enum):
+    """Compression of the members written to the new file
+
+    Available options: FAST, DEFAULT, SMALL.
+    """
+    FAST = "fast"
+    DEFAULT = "default"
+    SMALL = "small"
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({self._name_})>"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}: {self._value_}"
+
+    @property
+    def level(self) -> int:
+        """The zlib compression level, -1 is the default one of zlib."""
+        return {"fast": 1, "default": -1, "small": 9}.get(self._value_)
+
+    def is_stored(self, name: str) -> bool:
+        """The fast profile stores the compressed media without the deflate."""
+        return self is CompressionProfile.FAST and Path(name).suffix.lower() in _COMPRESSED_SUFFIXES
+
+
 # noinspection PyUnresolvedReferences
 class FileItem(NamedTuple):
     """Parameters selected by the user
@@ -403,6 +434,31 @@ class FileItem(NamedTuple):
         return f"<{self.__class__.__name__}({self._asdict().values()})>"
 
 
+class FileResult(NamedTuple):
+    """Result of the file processing
+
+    Attributes:
+        path_file (Path): The path to the original file
+        name_updated (str | None): The path to the modified file if the processing has succeeded
+        error (str | None): The error message if the processing has failed
+        metrics (dict[str, Any] | None): The resources used by the stages if the instrumentation is enabled
+    """
+    path_file: Path
+    name_updated: str | None
+    error: str | None
+    metrics: dict[str, Any] | None = None
+
+    def __str__(self):
+        return f"{self.__class__.__name__}: {self.path_file}"
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({self._asdict().values()})>"
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
 class UserInputValues:
     __slots__ = (
         "_path_files",
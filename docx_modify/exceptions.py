@@ -49,3 +49,7 @@ class InvalidXmlFileError(BaseError):
 
 class RequiredXmlFileMissingError(BaseError):
     """XML file must be in the archive, but it is missing."""
+
+
+class XmlFileStreamedError(BaseError):
+    """XML file is rewritten in the streaming mode, so it cannot be loaded as a whole."""
@@ -1,23 +1,27 @@
 # -*- coding: utf-8 -*-
+from functools import partial
 from pathlib import Path
-from shutil import rmtree
 from textwrap import dedent
 from time import sleep
+from typing import Callable
 
 from loguru import logger
+from lxml.etree import ElementBase
 
-from docx_modify.const import temp_path, log_folder
+from docx_modify.const import log_folder
 from docx_modify.core_elements.core_document import CoreDocument
 from docx_modify.core_elements.core_zip_file import CoreZipFile
+from docx_modify.core_elements.parallel_deflate import parallel_deflate
 from docx_modify.enum_element import DocumentMode, DocumentSide, FileItem, SectionOrientation, UserInputValues, \
-    CompanyName
+    CompanyName, FileResult
 from docx_modify.exceptions import BaseError
-from docx_modify.interface.gui import get_user_input
-from docx_modify.init_logger import custom_logging
+from docx_modify.init_logger import Deferred, custom_logging
+from docx_modify.instrumentation import instrumentation
+from docx_modify.result_cache import result_cache
 from docx_modify.word_elements.word_file_collection import WordFileCollection
 from docx_modify.xml_elements.xml_body import XmlBody
 from docx_modify.xml_elements.xml_content_types import XmlContentTypes
-from docx_modify.xml_elements.xml_document import XmlDocument
+from docx_modify.xml_elements.xml_document import XmlDocument, XmlDocumentStream
 from docx_modify.xml_elements.xml_file_fixer import XmlFileFixer
 from docx_modify.xml_elements.xml_hdr_ftr import HdrFtrReference, HdrFtrRelReferenceController
 from docx_modify.xml_elements.xml_properties import XmlProperties, DocProperty
@@ -85,21 +89,50 @@ def show_prompt():
     sleep(1)
 
 
-def _core_preprocessing(path: Path, document_mode: DocumentMode) -> CoreZipFile:
+def _core_document(path: Path, document_mode: DocumentMode) -> CoreDocument:
     _names: dict[DocumentMode, str] = {
         DocumentMode.ARCH: "арх",
         DocumentMode.TYPO: "тпг",
         DocumentMode.PROG: "прг"}
 
     core_document: CoreDocument = CoreDocument(path)
-    core_document.duplicate(_names.get(document_mode))
-    core_zip_file: CoreZipFile = CoreZipFile(core_document)
+    core_document.set_output(_names.get(document_mode))
+    return core_document
+
+
+@instrumentation.timed("cache")
+def _from_cache(core_document: CoreDocument, cache_key: str) -> str | None:
+    if result_cache.get(cache_key, core_document.path_output):
+        return core_document.name_updated
+
+    return None
+
+
+@instrumentation.timed("cache")
+def _to_cache(cache_key: str, name_updated: str):
+    result_cache.put(cache_key, Path(name_updated))
+
+
+@instrumentation.timed("unzip")
+def _core_preprocessing(core_document: CoreDocument, in_memory: bool = False) -> CoreZipFile:
+    path: Path = core_document.path
+
+    if not in_memory:
+        core_document.make_workspace()
+
+    core_zip_file: CoreZipFile = CoreZipFile(core_document, in_memory)
     core_zip_file.unarchive()
-    logger.success(f"Разархивирован файл {path}")
+
+    if in_memory:
+        logger.success(f"Файл {path} загружен в память")
+
+    else:
+        logger.success(f"Разархивирован файл {path}")
 
     return core_zip_file
 
 
+@instrumentation.timed("delete_files")
 def _delete_files(core_zip_file: CoreZipFile):
     core_zip_file.delete_files("word/header*.xml")
     core_zip_file.delete_files("word/footer*.xml")
@@ -109,6 +142,7 @@ def _delete_files(core_zip_file: CoreZipFile):
     logger.success("Удалены старые колонтитулы")
 
 
+@instrumentation.timed("word_files")
 def _word_files_processing(
         core_zip_file: CoreZipFile,
         document_mode: DocumentMode,
@@ -131,6 +165,7 @@ def _word_files_processing(
     word_file_collection.add_word_file_military()
 
 
+@instrumentation.timed("settings")
 def _xml_files_processing(
         core_zip_file: CoreZipFile,
         document_side: DocumentSide,
@@ -142,6 +177,7 @@ def _xml_files_processing(
     logger.success("Изменены параметры файла")
 
 
+@instrumentation.timed("styles")
 def _xml_styles_processing(core_zip_file: CoreZipFile, change_list: bool):
     xml_basic_styles: XmlBasicStyles = XmlBasicStyles(core_zip_file)
     xml_basic_styles.read()
@@ -154,14 +190,16 @@ def _xml_styles_processing(core_zip_file: CoreZipFile, change_list: bool):
     logger.success("Добавлены новые стили")
 
 
-def _xml_content_types_processing(core_zip_file: CoreZipFile, document_mode: DocumentMode):
-    xml_content_types: XmlContentTypes = XmlContentTypes(core_zip_file, document_mode)
+@instrumentation.timed("content_types")
+def _xml_content_types_processing(core_zip_file: CoreZipFile):
+    xml_content_types: XmlContentTypes = XmlContentTypes(core_zip_file)
     xml_content_types.read()
     xml_content_types.fix_content_types()
 
     logger.success("Обновлен файл [Content_Types].xml")
 
 
+@instrumentation.timed("properties")
 def _xml_properties_processing(core_zip_file: CoreZipFile, document_side: DocumentSide, company_name: CompanyName):
     xml_properties: XmlProperties = XmlProperties(core_zip_file, document_side)
     xml_properties.read()
@@ -169,13 +207,13 @@ def _xml_properties_processing(core_zip_file: CoreZipFile, document_side: Docume
 
     logger.success("Определены пользовательские свойства документа")
 
-    if not xml_properties.exists:
-        xml_relationships: XmlRelationshipsGlobal = XmlRelationshipsGlobal(core_zip_file)
-        xml_relationships.read()
-        xml_relationships.set_xml_relationships()
-        xml_relationships.add_custom()
+    # the file may have been created by _get_company_name, so the relationship is checked instead
+    xml_relationships: XmlRelationshipsGlobal = XmlRelationshipsGlobal(core_zip_file)
+    xml_relationships.read()
+    xml_relationships.add_custom()
 
 
+@instrumentation.timed("company_name")
 def _get_company_name(core_zip_file: CoreZipFile, document_side: DocumentSide):
     xml_properties: XmlProperties = XmlProperties(core_zip_file, document_side)
     xml_properties.read()
@@ -186,6 +224,7 @@ def _get_company_name(core_zip_file: CoreZipFile, document_side: DocumentSide):
     return CompanyName.from_decimal_number(decimal_number)
 
 
+@instrumentation.timed("relationships")
 def _xml_relationships_file(core_zip_file: CoreZipFile) -> XmlWordRelationships:
     xml_relationships: XmlWordRelationships = XmlWordRelationships(core_zip_file)
     xml_relationships.read()
@@ -198,6 +237,11 @@ def _xml_relationships_file(core_zip_file: CoreZipFile) -> XmlWordRelationships:
     return xml_relationships
 
 
+def _join_items(items: list[tuple[str, str]]) -> str:
+    return "\n".join([f"ключ {k}, значение {v}" for k, v in items])
+
+
+@instrumentation.timed("hdr_ftr")
 def _hdr_ftr_rel_references(
         xml_relationships: XmlWordRelationships,
         document_mode: DocumentMode,
@@ -213,13 +257,51 @@ def _hdr_ftr_rel_references(
         xml_relationships.add_xml_relationship(xml_relationship)
 
     xml_relationships.save()
-    xml_rels: str = "\n".join([f"ключ {k}, значение {v}" for k, v in xml_relationships.items()])
-
-    logger.info(f"Relationships:\n{xml_rels}")
+    # the list is joined only if the message is output, the records are kept in the ring buffer,
+    # so the relationships are captured as text, not as the objects holding the parsed trees
+    _items: list[tuple[str, str]] = [(k, str(v)) for k, v in xml_relationships.items()]
+    logger.bind(details=Deferred(_join_items, _items)).info("Relationships:")
 
     return _hdr_ftr
 
 
+def _xml_section_processing(
+        xml_document: XmlDocument,
+        section_index: int,
+        section: ElementBase,
+        document_mode: DocumentMode,
+        document_side: DocumentSide,
+        hdr_ftr: HdrFtrRelReferenceController,
+        hdr_ftr_references: dict[str, str]):
+    xml_section: XmlSection = XmlSection(
+        xml_document, section_index, document_mode, document_side, section).make_xml_section_mode()
+    xml_section.read()
+    xml_section.set_section()
+
+    if xml_section.orientation == SectionOrientation.LANDSCAPE:
+        _section_index: int = -1
+
+    elif section_index > 2:
+        _section_index: int = 2
+
+    else:
+        _section_index: int = section_index
+
+    for header_footer in hdr_ftr.section_hdr_ftr(_section_index):
+        rel_id: str = hdr_ftr_references.get(header_footer.rel_target.value)
+        hdr_ftr_reference: HdrFtrReference = header_footer.hdr_ftr_reference(rel_id)
+
+        xml_section.add_header_footer_reference(hdr_ftr_reference)
+        xml_section.write()
+
+
+def _xml_body_processing(xml_document: XmlDocument):
+    xml_body: XmlBody = XmlBody(xml_document)
+    xml_body.set_change_list()
+    logger.success("Добавлен лист регистрации изменений")
+
+
+@instrumentation.timed("document")
 def _xml_document_file(
         core_zip_file: CoreZipFile,
         document_mode: DocumentMode,
@@ -229,59 +311,86 @@ def _xml_document_file(
         hdr_ftr: HdrFtrRelReferenceController):
     xml_document: XmlDocument = XmlDocument(core_zip_file)
     xml_document.read()
+    hdr_ftr_references: dict[str, str] = xml_relationships.hdr_ftr_references()
 
-    for section_index in range(len(xml_document)):
-        xml_section: XmlSection = XmlSection(
-            xml_document, section_index, document_mode, document_side).make_xml_section_mode()
-        xml_section.read()
-        xml_section.set_section()
+    for section_index, section in enumerate(xml_document.sections):
+        _xml_section_processing(
+            xml_document, section_index, section, document_mode, document_side, hdr_ftr, hdr_ftr_references)
 
-        if xml_section.orientation == SectionOrientation.LANDSCAPE:
-            _section_index: int = -1
+    logger.success("Изменены секции в файле")
 
-        elif section_index > 2:
-            _section_index: int = 2
+    if change_list:
+        _xml_body_processing(xml_document)
+    # close the file
+    xml_document.save()
 
-        else:
-            _section_index: int = section_index
 
-        for header_footer in hdr_ftr.section_hdr_ftr(_section_index):
-            rel_id: str = xml_relationships.hdr_ftr_references().get(header_footer.rel_target.value)
-            hdr_ftr_reference: HdrFtrReference = header_footer.hdr_ftr_reference(rel_id)
+@instrumentation.timed("document")
+def _xml_document_stream(
+        core_zip_file: CoreZipFile,
+        document_mode: DocumentMode,
+        document_side: DocumentSide,
+        change_list: bool,
+        xml_relationships: XmlWordRelationships,
+        hdr_ftr: HdrFtrRelReferenceController):
+    xml_document: XmlDocumentStream = XmlDocumentStream(core_zip_file)
+    hdr_ftr_references: dict[str, str] = xml_relationships.hdr_ftr_references()
+
+    section_handler: partial = partial(
+        _xml_section_processing,
+        xml_document,
+        document_mode=document_mode,
+        document_side=document_side,
+        hdr_ftr=hdr_ftr,
+        hdr_ftr_references=hdr_ftr_references)
+    body_handler: partial | None = partial(_xml_body_processing, xml_document) if change_list else None
 
-            xml_section.add_header_footer_reference(hdr_ftr_reference)
-            xml_section.write()
+    xml_document.process(section_handler, body_handler)
 
     logger.success("Изменены секции в файле")
-
-    if change_list:
-        xml_body: XmlBody = XmlBody(xml_document)
-        xml_body.set_change_list()
-        logger.success("Добавлен лист регистрации изменений")
-    # close the file
     xml_document.save()
 
 
+@instrumentation.timed("file_fix")
 def _xml_file_fix(
+        core_zip_file: CoreZipFile,
         document_mode: DocumentMode,
         document_side: DocumentSide,
         approvement_list: bool):
     xml_file_fixer: XmlFileFixer = XmlFileFixer(
+        core_zip_file,
         document_mode=document_mode,
         document_side=document_side,
         approvement_list=approvement_list)
     xml_file_fixer.replace()
 
 
-def file_modify(file_item: FileItem):
-    rmtree(temp_path.joinpath("_docx_temp"), True)
+def file_modify(file_item: FileItem, in_memory: bool = True, streaming: bool = False):
+    """Modifies the file.
 
-    logger.info("Временная директория _docx_temp удалена")
+    If in_memory is True, the parts of the archive are kept in memory instead of the temp directory.
+    Otherwise, the archive is unpacked to the separate temp directory of the file.
+
+    If streaming is True, the word/document.xml file is rewritten in a single pass without
+    loading it as a whole, it is recommended for very large documents along with in_memory=False.
+
+    If the same file has been modified with the same options and templates before, the result is
+    copied from the cache without processing.
+    """
+    # the new name is chosen once, the cached result is copied to it or the new archive is written to it
+    core_document: CoreDocument = _core_document(file_item.path_file, file_item.document_mode)
+    cache_key: str | None = result_cache.key(file_item)
+    name_updated: str | None = _from_cache(core_document, cache_key) if cache_key is not None else None
+
+    if name_updated is not None:
+        logger.success(f'Файл "{file_item.path_file}" не изменился, результат взят из кэша')
+        logger.success(f"Новый файл: {name_updated}")
+        print("-------------------------------------------------------------------------------\n")
+        return name_updated
 
     # initiate the core files and classes, unpack the docx document as the ZIP archive
-    core_zip_file: CoreZipFile = _core_preprocessing(file_item.path_file, file_item.document_mode)
-    _str_files: str = "\n".join(core_zip_file.files)
-    logger.info(f"Файлы внутри архива:\n{_str_files}")
+    core_zip_file: CoreZipFile = _core_preprocessing(core_document, in_memory)
+    logger.bind(details=Deferred("\n".join, core_zip_file.files)).info("Файлы внутри архива:")
 
     with core_zip_file as core_zf:
         _delete_files(core_zf)
@@ -294,13 +403,12 @@ def file_modify(file_item: FileItem):
         _word_files_processing(core_zf, file_item.document_mode, company_name, file_item.def_ministry)
 
         # do some changes in the xml files based on the predefined ones
-        _xml_content_types_processing(core_zf, file_item.document_mode)
+        _xml_content_types_processing(core_zf)
         _xml_files_processing(core_zf, file_item.document_side, file_item.document_mode)
         _xml_styles_processing(core_zf, file_item.change_list)
 
         # do some changes in the document.xml.rels file
         xml_relationships: XmlWordRelationships = _xml_relationships_file(core_zf)
-        xml_relationships.read()
 
         # do operations with the header*.xml and footer*.xml files
         hdr_ftr_rel_controller: HdrFtrRelReferenceController = _hdr_ftr_rel_references(
@@ -309,7 +417,8 @@ def file_modify(file_item: FileItem):
             file_item.def_ministry)
 
         # do operations with the sectPr and headerReference/footerReference elements
-        _xml_document_file(
+        _xml_document: Callable[..., None] = _xml_document_stream if streaming else _xml_document_file
+        _xml_document(
             core_zf,
             file_item.document_mode,
             file_item.document_side,
@@ -318,63 +427,84 @@ def file_modify(file_item: FileItem):
             hdr_ftr_rel_controller)
 
         # fill in the gaps in the xml files
-        _xml_file_fix(file_item.document_mode, file_item.document_side, file_item.approvement_list)
+        _xml_file_fix(core_zf, file_item.document_mode, file_item.document_side, file_item.approvement_list)
 
         # pack the archive to the docx file
-        core_zf.delete_temp_archive()
+        with instrumentation.stage("archive"):
+            core_zf.delete_temp_archive()
+
+    if cache_key is not None:
+        _to_cache(cache_key, core_zip_file.name_updated())
 
     logger.success("Файл сохранен")
     logger.success(f'Обработка файла "{file_item.path_file}" завершена')
     logger.success(f"Новый файл: {core_zip_file.name_updated()}")
     print("-------------------------------------------------------------------------------\n")
-    return
+    return core_zip_file.name_updated()
 
 
-@logger.catch
-def run_script():
-    """Main entrance point of the program."""
-    custom_logging("docx_modify")
-    _error_flag: bool = False
+def process_file(file_item: FileItem, in_memory: bool = True, streaming: bool = False) -> FileResult:
+    """Modifies the file and catches the errors that must not stop processing the other files.
 
-    show_prompt()
-    user_input_values: UserInputValues | None = get_user_input()
+    If the instrumentation is enabled, the resources used by the stages are added to the result.
+    """
+    with instrumentation.document(file_item.path_file) as metrics:
+        file_result: FileResult = _process_file(file_item, in_memory, streaming)
 
-    if user_input_values is not None:
-        for file_item in iter(user_input_values):
-            try:
-                file_modify(file_item)
+    if metrics is not None:
+        metrics["success"] = file_result.success
+        metrics["compression"] = parallel_deflate.compression.value
+        file_result: FileResult = file_result._replace(metrics=metrics)
+
+    return file_result
 
-            except PermissionError as e:
-                logger.error(f"Недостаточно прав для изменения файла {e.strerror}")
-                _error_flag = True
-                continue
 
-            except RuntimeError:
-                logger.error(f"Ошибка обработки файла {file_item.path_file}")
-                _error_flag = True
-                continue
+def _process_file(file_item: FileItem, in_memory: bool, streaming: bool) -> FileResult:
+    try:
+        name_updated: str = file_modify(file_item, in_memory, streaming)
 
-            except FileNotFoundError as e:
-                logger.error(f"Не найден файл {e.filename}")
-                _error_flag = True
-                continue
+    except PermissionError as e:
+        message: str = f"Недостаточно прав для изменения файла {e.strerror}"
 
-            except BaseError as e:
-                logger.error(f"Возникла ошибка {e.__class__.__name__}.\n{str(e)}")
-                _error_flag = True
-                continue
+    except RuntimeError:
+        message: str = f"Ошибка обработки файла {file_item.path_file}"
 
-            except OSError as e:
-                logger.error(f"Ошибка {e.__class__.__name__}.\n{e.strerror}")
-                _error_flag = True
-                continue
+    except FileNotFoundError as e:
+        message: str = f"Не найден файл {e.filename}"
 
-    logger.remove()
+    except BaseError as e:
+        message: str = f"Возникла ошибка {e.__class__.__name__}.\n{str(e)}"
 
-    if not _error_flag:
-        rmtree(log_folder, True)
+    except OSError as e:
+        message: str = f"Ошибка {e.__class__.__name__}.\n{e.strerror}"
 
     else:
+        return FileResult(file_item.path_file, name_updated, None)
+
+    logger.error(message)
+    return FileResult(file_item.path_file, None, message)
+
+
+@custom_logging("docx_modify")
+@logger.catch
+def run_script():
+    """Main entrance point of the program."""
+    _error_flag: bool = False
+
+    # tkinter is imported only for the interactive mode
+    from docx_modify.interface.gui import get_user_input
+
+    show_prompt()
+    user_input_values: UserInputValues | None = get_user_input()
+
+    if user_input_values is not None:
+        from docx_modify.batch_processing import default_workers, run_batch
+
+        file_results: list[FileResult] = run_batch(user_input_values, default_workers())
+        _error_flag = not all(file_result.success for file_result in file_results)
+
+    # the log file is written only if the errors occur
+    if _error_flag:
         print(f"Лог-файл находится в директории {log_folder}")
 
     input("Нажмите клавишу <Enter>, чтобы закрыть окно ...")
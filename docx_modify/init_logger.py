@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 import faulthandler
+from collections import deque
+from functools import wraps
 # noinspection PyProtectedMember
 from logging import Handler, LogRecord, currentframe, basicConfig
-from os import getenv
+from os import getenv, replace
+from pathlib import Path
 from shutil import rmtree
 from sys import stdout as sysout
+from traceback import format_exception
 from types import FrameType
 from typing import Any, Callable, Literal, Type, NamedTuple
 
@@ -12,7 +16,7 @@ from loguru import logger
 
 from docx_modify.const import log_folder, version
 
-HandlerType: Type[str] = Literal["stream", "file_rotating"]
+HandlerType: Type[str] = Literal["stream", "buffer"]
 LoggingLevel: Type[str] = Literal["TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL"]
 ColorLevel: Type[str] = Literal["red", "blue", "green", "magenta", "light-green", "cyan"]
 StyleLevel: Type[str] = Literal["bold", "italic", "underline", "normal"]
@@ -31,7 +35,37 @@ _COLORED_FORMAT: str = " | ".join(
 
 _USER_FORMAT: str = "{message}\n"
 
-__all__ = ["custom_logging"]
+# the size of the log file to start the new one
+_MAX_LOG_SIZE: int = 2 << 20
+
+__all__ = ["Deferred", "RingBufferSink", "buffer_logging", "console_logging", "custom_logging", "default_buffer_size"]
+
+
+class Deferred:
+    """The details of the log message built only when the record is output.
+
+    The ring buffer keeps the records of all levels, so the long texts, e.g. the joins of the archive
+    members, are passed as the "details" extra and built by the sinks, not by the logger:
+
+        logger.bind(details=Deferred("\n".join, names)).info("Файлы внутри архива:")
+
+    The arguments are kept as long as the record is in the buffer, so they must be the plain data,
+    e.g. the strings, never the objects referring to the parsed trees or archives, and must not be
+    changed after the message is logged.
+    """
+
+    def __init__(self, func: Callable[..., str], *args):
+        self._func: Callable[..., str] = func
+        self._args: tuple = args
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({self._func!r})>"
+
+    def __str__(self):
+        return self._func(*self._args)
+
+    def __format__(self, format_spec: str) -> str:
+        return format(str(self), format_spec)
 
 
 class LevelColorStyle(NamedTuple):
@@ -89,22 +123,25 @@ def formatter(record: dict) -> str:
     _warning_head: str = "Предупреждение: "
     _warning_tail: str = ""
 
+    # the details are built here, only if the record is output to the console
+    _message: str = "{message}\n{extra[details]}" if "details" in record["extra"] else "{message}"
+
     if record["exception"] is not None:
-        return "<level>Ошибка при запуске скрипта | {message}\n{exception}</level>\n"
+        return "<level>Ошибка при запуске скрипта | %s\n{exception}</level>\n" % _message
 
     level_name: str = record["level"].name
 
     if level_name == "SUCCESS":
-        return "<level>{message}</level>\n"
+        return "<level>%s</level>\n" % _message
 
     elif level_name == "WARNING":
-        return "<level>%s{message}%s</level>\n" % (_warning_head, _warning_tail)
+        return "<level>%s%s%s</level>\n" % (_warning_head, _message, _warning_tail)
 
     elif level_name == "ERROR":
-        return "<level>%s{message}%s</level>\n" % (_error_head, _error_tail)
+        return "<level>%s%s%s</level>\n" % (_error_head, _message, _error_tail)
 
     else:
-        return "<level>{message}</level>\n"
+        return "<level>%s</level>\n" % _message
 
 
 class LoggerConfiguration:
@@ -135,35 +172,133 @@ class LoggerConfiguration:
             print(f"{exc.__class__.__name__}, {str(exc)}")
             return
 
-    def rotating_file_handler(self) -> dict[str, Any] | None:
-        try:
-            _logging_level: str = self._handlers.get("file_rotating")
-            _log_path: str = str(
-                log_folder.joinpath(f"{self._file_name}_{_logging_level.lower()}.log"))
+    def buffer_handler(self) -> dict[str, Any] | None:
+        _capacity: int = default_buffer_size()
 
-            return {
-                "sink": _log_path,
-                "level": _logging_level,
-                "format": _COLORED_FORMAT,
-                "colorize": False,
-                "diagnose": True,
-                "backtrace": True,
-                "rotation": "2 MB",
-                "mode": "a",
-                "encoding": "utf-8",
-                "catch": True}
+        if not _capacity:
+            return
 
-        except KeyError as exc:
-            print(f"{exc.__class__.__name__}, {str(exc)}")
+        return {
+            "sink": RingBufferSink(log_folder.joinpath(f"{self._file_name}_debug.log"), _capacity),
+            "level": self._handlers.get("buffer", "DEBUG"),
+            # the record is formatted only when the buffer is written to the file
+            "format": "{message}",
+            "colorize": False,
+            "backtrace": False,
+            "diagnose": False,
+            "catch": True}
+
+
+def default_buffer_size() -> int:
+    """The number of the last records kept in memory, may be set by the DOCX_MODIFY_LOG_BUFFER variable.
+
+    The value 0 disables the capture of the debug messages, the log file is not written at all.
+    """
+    _size: str = getenv("DOCX_MODIFY_LOG_BUFFER", "10000")
+
+    try:
+        size: int = int(_size)
+
+    except ValueError:
+        print(f"Некорректный размер буфера логов {_size}, используется 10000")
+        size: int = 10000
+
+    return max(size, 0)
+
+
+def _format_record(record: dict) -> str:
+    # the same layout as _WB_FORMAT, the details are built only now
+    lines: list[str] = [
+        f"{record['time']:%d-%b-%Y %H:%M:%S}::{record['level'].name} | "
+        f"{record['module']}::{record['function']} | "
+        f"{record['file'].name}::{record['name']}::{record['line']} | \n"
+        f"{record['message']}\n"]
+
+    if "details" in record["extra"]:
+        lines.append(f"{record['extra']['details']}\n")
+
+    if record["exception"] is not None:
+        _type, _value, _traceback = record["exception"]
+        lines.extend(format_exception(_type, _value, _traceback))
+
+    return "".join(lines)
+
+
+class RingBufferSink:
+    """The last log records kept in memory.
+
+    The records are written to the log file only if the error is logged, so the successful runs
+    do not write anything to the disk. The oldest records are dropped if the buffer is full.
+    """
+
+    def __init__(self, path: Path, capacity: int):
+        self._path: Path = path
+        self._records: deque[dict] = deque(maxlen=capacity)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({self._path}, {self._records.maxlen})>"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}: {self._path}, {len(self._records)}/{self._records.maxlen}"
+
+    def __len__(self):
+        return len(self._records)
+
+    def __call__(self, message):
+        self._records.append(message.record)
+
+        if message.record["level"].no >= 40:
+            self.flush()
+
+    def clear(self):
+        self._records.clear()
+
+    def flush(self):
+        """Writes the records to the log file at once, the file is started anew if it is too large."""
+        if not self._records:
             return
 
+        text: str = "".join(map(_format_record, self._records))
+        self._records.clear()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+
+        if self._path.exists() and self._path.stat().st_size > _MAX_LOG_SIZE:
+            replace(self._path, self._path.with_suffix(".old.log"))
+
+        # the worker processes append to the same file, so the text is written by one call
+        with open(self._path, "a", encoding="utf-8") as f:
+            f.write(text)
+
 
-def custom_logging(name: str, is_delete: bool = False):
-    # enable the faulthandler
-    if not faulthandler.is_enabled():
-        faulthandler.enable()
+def console_logging():
+    """Configures the logger to output the messages only to the console, without the log file."""
+    stream_level: LoggingLevel | str = "SUCCESS" if getenv("DOCX_MODIFY_LOGS", None) is None else "DEBUG"
+    logger_configuration: LoggerConfiguration = LoggerConfiguration(
+        "docx_modify", {"stream": stream_level, "buffer": "DEBUG"})
+    handlers: list[dict[str, Any] | None] = [
+        logger_configuration.stream_handler(),
+        logger_configuration.buffer_handler()]
+    logger.configure(handlers=[handler for handler in handlers if handler is not None])
+
+
+def buffer_logging():
+    """Configures the logger to keep the messages in memory only, used by the worker processes."""
+    logger_configuration: LoggerConfiguration = LoggerConfiguration("docx_modify", {"buffer": "DEBUG"})
+    buffer_handler: dict[str, Any] | None = logger_configuration.buffer_handler()
+    logger.configure(handlers=[buffer_handler] if buffer_handler is not None else [])
+
+
+def custom_logging(name: str, is_delete: bool = False) -> Callable:
+    """Decorator to configure the logger for the run of the function.
+
+    The messages are output to the console and kept in the ring buffer written to the log file on errors.
+    """
+    # delete the log file and folder
+    if is_delete:
+        rmtree(log_folder, True)
 
     def inner(func: Callable):
+        @wraps(func)
         def wrapper(*args, **kwargs):
             LEVEL_COLOR_STYLE: tuple[LevelColorStyle, ...] = (
                 LevelColorStyle("DEBUG", "light-green"),
@@ -176,16 +311,15 @@ def custom_logging(name: str, is_delete: bool = False):
             stream_level: LoggingLevel | str = "SUCCESS" if getenv("DOCX_MODIFY_LOGS", None) is None else "DEBUG"
             handlers: dict[HandlerType, LoggingLevel | str] | None = {
                 "stream": stream_level,
-                "file_rotating": "DEBUG"}
-
-            file_name: str = name
+                "buffer": "DEBUG"}
 
             # specify the handlers
-            logger_configuration: LoggerConfiguration = LoggerConfiguration(file_name, handlers)
-            stream_handler: dict[str, Any] = logger_configuration.stream_handler()
-            rotating_file_handler: dict[str, Any] = logger_configuration.rotating_file_handler()
+            logger_configuration: LoggerConfiguration = LoggerConfiguration(name, handlers)
+            _handlers: list[dict[str, Any] | None] = [
+                logger_configuration.stream_handler(),
+                logger_configuration.buffer_handler()]
 
-            logger.configure(handlers=[stream_handler, rotating_file_handler])
+            logger.configure(handlers=[handler for handler in _handlers if handler is not None])
 
             # specify the styles for the levels
             for item in LEVEL_COLOR_STYLE:
@@ -199,19 +333,22 @@ def custom_logging(name: str, is_delete: bool = False):
             logger.success(f"Версия: {version()}")
             logger.success("Запуск программы:")
 
-            return func(*args, **kwargs)
+            # enable the faulthandler for the run
+            _faulthandler: bool = faulthandler.is_enabled()
 
-        return wrapper
+            if not _faulthandler:
+                faulthandler.enable()
 
-    # disable faulthandler
-    if faulthandler.is_enabled():
-        faulthandler.disable()
+            try:
+                return func(*args, **kwargs)
 
-    # disable loguru logger
-    logger.remove()
+            finally:
+                if not _faulthandler:
+                    faulthandler.disable()
 
-    # delete the log file and folder
-    if is_delete:
-        rmtree(log_folder, True)
+                # disable loguru logger
+                logger.remove()
+
+        return wrapper
 
     return inner
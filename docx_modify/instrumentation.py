@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+from contextlib import contextmanager
+from functools import wraps
+from json import dumps
+from os import getenv
+from pathlib import Path
+from sys import platform
+from time import perf_counter, process_time
+from typing import Any, Callable, Iterable, Iterator, NamedTuple
+
+from loguru import logger
+
+try:
+    from resource import RUSAGE_SELF, getrusage
+
+except ImportError:
+    # the module is not available on Windows, the peak memory is not recorded
+    getrusage = None
+
+__all__ = ["COUNTERS", "StageMetrics", "Instrumentation", "instrumentation", "peak_rss", "summary"]
+
+# the values counted inside the stages
+COUNTERS: tuple[str, ...] = ("read", "written", "parsed", "serialized")
+
+
+def peak_rss() -> int | None:
+    """The peak resident set size of the process in bytes."""
+    if getrusage is None:
+        return None
+
+    max_rss: int = getrusage(RUSAGE_SELF).ru_maxrss
+    # the value is in kilobytes on Linux and in bytes on macOS
+    return max_rss if platform == "darwin" else max_rss * 1024
+
+
+class StageMetrics(NamedTuple):
+    """Resources used by the stage of the file processing.
+
+    Attributes:
+        stage (str): The name of the stage
+        wall (float): The elapsed time in seconds
+        cpu (float): The CPU time of the process in seconds
+        peak_rss (int | None): The peak memory of the process at the end of the stage in bytes
+        read (int): The number of bytes read from the source archive and the workspace
+        written (int): The number of bytes written to the workspace and the new file
+        parsed (int): The number of the XML parts parsed
+        serialized (int): The number of the XML parts serialized
+    """
+    stage: str
+    wall: float
+    cpu: float
+    peak_rss: int | None
+    read: int = 0
+    written: int = 0
+    parsed: int = 0
+    serialized: int = 0
+
+    def __str__(self):
+        return f"{self.__class__.__name__}: {self.stage}, {self.wall:.3f} с"
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({self._asdict().values()})>"
+
+
+class Instrumentation:
+    """Opt-in recording of the resources used by each stage of each file.
+
+    It is enabled by the DOCX_MODIFY_METRICS variable or the --metrics option. The value is the path
+    to the JSONL report, one line per file, or "-" to output the summary table only.
+    If disabled, the stages are only called, nothing is measured.
+    """
+
+    def __init__(self, path: str | None = None):
+        self._path: str | None = path
+        self._stages: list[StageMetrics] | None = None
+        self._counters: dict[str, int] | None = None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({self._path})>"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}: {self._path}"
+
+    @property
+    def enabled(self) -> bool:
+        return self._path is not None
+
+    @property
+    def path(self) -> str | None:
+        return self._path
+
+    def configure(self, path: str | None):
+        self._path = path
+
+    def count(self, counter: str, value: int = 1):
+        """Adds the value to the counter of the current stage, if any."""
+        if self._counters is not None:
+            self._counters[counter] += value
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Measures the stage, the nested stages are counted as a part of the outer one."""
+        if self._stages is None or self._counters is not None:
+            yield
+            return
+
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        wall: float = perf_counter()
+        cpu: float = process_time()
+
+        try:
+            yield
+
+        finally:
+            self._stages.append(StageMetrics(
+                name, perf_counter() - wall, process_time() - cpu, peak_rss(), **self._counters))
+            self._counters = None
+
+    def timed(self, name: str) -> Callable:
+        """Decorator to measure the function as the stage."""
+        def inner(func: Callable):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return inner
+
+    @contextmanager
+    def document(self, path: Path) -> Iterator[dict[str, Any] | None]:
+        """Measures the processing of the file.
+
+        Yields the record filled in after the processing or None if the instrumentation is disabled.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        record: dict[str, Any] = {"file": str(path)}
+        self._stages = []
+        wall: float = perf_counter()
+        cpu: float = process_time()
+
+        try:
+            yield record
+
+        finally:
+            record.update(
+                wall=perf_counter() - wall,
+                cpu=process_time() - cpu,
+                peak_rss=peak_rss(),
+                stages=[stage_metrics._asdict() for stage_metrics in self._stages])
+            self._stages = None
+
+    def report(self, records: Iterable[dict[str, Any]]):
+        """Writes the records to the JSONL file and outputs the summary table."""
+        records: list[dict[str, Any]] = [record for record in records if record is not None]
+
+        if not self.enabled or not records:
+            return
+
+        if self._path != "-":
+            with open(self._path, "a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(f"{dumps(record, ensure_ascii=False)}\n")
+
+            logger.info(f"Замеры записаны в файл {self._path}")
+
+        logger.success(summary(records))
+
+
+def _mb(value: int | None) -> str:
+    return "-" if value is None else f"{value / (1 << 20):.1f}"
+
+
+def summary(records: Iterable[dict[str, Any]]) -> str:
+    """The table of the stages summed over all files, the peak memory is the maximum one."""
+    totals: dict[str, dict[str, Any]] = {}
+    _files: int = 0
+    _compressions: dict[str, None] = {}
+
+    for record in records:
+        _files += 1
+        _compressions[record.get("compression", "default")] = None
+
+        for stage_metrics in record.get("stages"):
+            _name: str = stage_metrics.get("stage")
+
+            if _name not in totals:
+                totals[_name] = {**stage_metrics}
+                continue
+
+            total: dict[str, Any] = totals.get(_name)
+
+            for key in ("wall", "cpu", *COUNTERS):
+                total[key] += stage_metrics.get(key)
+
+            if stage_metrics.get("peak_rss") is not None:
+                total["peak_rss"] = max(total.get("peak_rss") or 0, stage_metrics.get("peak_rss"))
+
+    _header: str = f"{'Этап':<16}{'Время, с':>10}{'ЦП, с':>10}{'Память, МБ':>12}{'Чтение, МБ':>12}" \
+                   f"{'Запись, МБ':>12}{'Разобрано':>11}{'Записано':>10}"
+    lines: list[str] = [f"Замеры по этапам, файлов: {_files}, сжатие: {', '.join(_compressions)}", _header]
+
+    for name, total in totals.items():
+        lines.append(
+            f"{name:<16}{total.get('wall'):>10.3f}{total.get('cpu'):>10.3f}{_mb(total.get('peak_rss')):>12}"
+            f"{_mb(total.get('read')):>12}{_mb(total.get('written')):>12}"
+            f"{total.get('parsed'):>11}{total.get('serialized'):>10}")
+
+    return "\n".join(lines)
+
+
+instrumentation: Instrumentation = Instrumentation(getenv("DOCX_MODIFY_METRICS", None) or None)
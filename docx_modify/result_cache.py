@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+from hashlib import sha256
+from os import getenv, getpid, replace, stat_result, utime
+from pathlib import Path
+from shutil import copyfile
+
+from loguru import logger
+
+from docx_modify.const import cache_root, version
+from docx_modify.core_elements.parallel_deflate import parallel_deflate
+from docx_modify.core_elements.template_registry import templates
+from docx_modify.enum_element import FileItem
+from docx_modify.instrumentation import instrumentation
+
+__all__ = ["ResultCache", "default_cache_size", "result_cache"]
+
+_SUFFIX: str = ".docx"
+
+
+def default_cache_size() -> int:
+    """The maximum size of the cache in bytes, may be set in megabytes by the DOCX_MODIFY_CACHE_SIZE variable.
+
+    The value 0 disables the cache.
+    """
+    _size: str = getenv("DOCX_MODIFY_CACHE_SIZE", "1024")
+
+    try:
+        size: int = int(_size)
+
+    except ValueError:
+        logger.warning(f"Некорректный размер кэша {_size}, используется 1024 МБ")
+        size: int = 1024
+
+    return max(size, 0) << 20
+
+
+class ResultCache:
+    """The modified files stored by the hash of the original file, the options and the templates.
+
+    The same file with the same options always produces the same result, so the stored file is copied
+    without processing. The least recently used files are deleted if the size of the cache is exceeded.
+    Errors of the cache never stop processing, the file is processed as usual.
+    """
+
+    def __init__(self, root: Path, max_size: int):
+        self._root: Path = root
+        self._max_size: int = max_size
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}({self._root}, {self._max_size})>"
+
+    def __str__(self):
+        return f"{self.__class__.__name__}: {self._root}, {self._max_size >> 20} МБ"
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_size > 0
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def configure(self, max_size: int):
+        self._max_size = max_size
+
+    def key(self, file_item: FileItem) -> str | None:
+        """The hash of the file and everything that affects the result, None if the cache is disabled."""
+        if not self.enabled:
+            return None
+
+        _hash = sha256()
+        _options: tuple = (
+            version(),
+            templates.fingerprint(),
+            parallel_deflate.compression.value,
+            file_item.document_mode.value,
+            file_item.document_side.value,
+            file_item.def_ministry,
+            file_item.change_list,
+            file_item.approvement_list)
+        _hash.update(repr(_options).encode("utf-8"))
+
+        with open(file_item.path_file, "rb") as fb:
+            while chunk := fb.read(1 << 20):
+                _hash.update(chunk)
+
+        return _hash.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self._root.joinpath(f"{key}{_SUFFIX}")
+
+    def get(self, key: str, path_output: Path) -> bool:
+        """Copies the stored file to the output path, returns False if there is no such file."""
+        _path: Path = self._path(key)
+
+        if not _path.exists():
+            return False
+
+        # the output appears only when it is copied completely, as if the file were processed
+        temp_path: Path = path_output.with_name(f"{path_output.name}.tmp")
+
+        try:
+            copyfile(_path, temp_path)
+            replace(temp_path, path_output)
+            # the file becomes the most recently used one
+            utime(_path)
+
+        except OSError as e:
+            temp_path.unlink(missing_ok=True)
+            logger.warning(f"Не удалось взять файл из кэша: {e.__class__.__name__}, {e.strerror}")
+            return False
+
+        instrumentation.count("read", path_output.stat().st_size)
+        instrumentation.count("written", path_output.stat().st_size)
+        logger.info(f"Файл {_path.name} взят из кэша")
+        return True
+
+    def put(self, key: str, path: Path):
+        """Stores the file, then deletes the least recently used ones exceeding the size."""
+        _size: int = path.stat().st_size
+
+        if _size > self._max_size:
+            return
+
+        _path: Path = self._path(key)
+        # the workers may store the same file at the same time
+        temp_path: Path = _path.with_name(f"{_path.name}.{getpid()}.tmp")
+
+        try:
+            self._root.mkdir(parents=True, exist_ok=True)
+            copyfile(path, temp_path)
+            replace(temp_path, _path)
+            self.evict()
+
+        except OSError as e:
+            temp_path.unlink(missing_ok=True)
+            logger.warning(f"Не удалось сохранить файл в кэш: {e.__class__.__name__}, {e.strerror}")
+            return
+
+        instrumentation.count("read", _size)
+        instrumentation.count("written", _size)
+        logger.info(f"Файл {_path.name} сохранен в кэш")
+
+    def evict(self):
+        files: list[tuple[float, int, Path]] = []
+
+        for path in self._root.glob(f"*{_SUFFIX}"):
+            try:
+                stat: stat_result = path.stat()
+
+            except FileNotFoundError:
+                continue
+
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        _size: int = sum(size for _, size, _ in files)
+
+        for _, size, path in sorted(files):
+            if _size <= self._max_size:
+                break
+
+            path.unlink(missing_ok=True)
+            _size -= size
+            logger.debug(f"Файл {path.name} удален из кэша")
+
+    def clear(self):
+        for path in self._root.glob(f"*{_SUFFIX}"):
+            path.unlink(missing_ok=True)
+
+
+result_cache: ResultCache = ResultCache(cache_root(), default_cache_size())
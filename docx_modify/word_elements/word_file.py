@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 from pathlib import Path
-from shutil import copy2
 
 from docx_modify.core_elements.core_zip_file import CoreZipFile, UnzippedFile
 from docx_modify.enum_element import DocumentMode
@@ -27,8 +26,8 @@ class WordFile(UnzippedFile):
         return self.basic_file_path.joinpath(self._name)
 
     @property
-    def full_path_zip_archive(self) -> Path:
-        return self.path_dir.joinpath(self.zip_archive_folder).joinpath(self._name)
+    def zip_archive_name(self) -> str:
+        return f"{self.zip_archive_folder}/{self._name}"
 
     @property
     def zip_archive_folder(self):
@@ -75,11 +74,10 @@ class _WordFileImage(WordFile):
     def zip_archive_folder(self) -> str:
         return "word/media"
 
-    def duplicate(self):
-        src: Path = self.basic_xml_file
-        dst: Path = self.basic_xml_file.with_name("_logo.png")
-        copy2(src, dst)
-        return self.__class__(dst.name, self._core_zip_file, self._document_mode)
+    @property
+    def zip_archive_name(self) -> str:
+        # the headers refer to the logo by the common name regardless of the company
+        return f"{self.zip_archive_folder}/_logo.png"
 
 
 class _WordFileRels(WordFile):
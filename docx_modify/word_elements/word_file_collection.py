@@ -5,9 +5,9 @@ from typing import Iterator
 from loguru import logger
 
 from docx_modify.core_elements.core_zip_file import CoreZipFile
+from docx_modify.core_elements.template_registry import templates
 from docx_modify.enum_element import DocumentMode, CompanyName
 from docx_modify.exceptions import CollectionItemNotFoundError, InvalidWordFileDirectoryNameError
-from docx_modify.const import parent_path
 from docx_modify.word_elements.word_file import WordFile, _WordFileHeaderFooter, _WordFileImage, _WordFileMilitary, \
     _WordFileRels
 
@@ -72,10 +72,10 @@ class WordFileCollection:
 
     def add_to_archive(self, name: str):
         for word_file in self.iter_files(name):
-            logger.info(f"Директория {word_file.full_path_zip_archive}")
+            logger.info(f"Директория {word_file.zip_archive_folder}")
             name_from: Path = word_file.basic_xml_file
-            name_to: Path = word_file.full_path_zip_archive
-            self._core_zip_file.copy(name_from, name_to)
+            name_to: str = word_file.zip_archive_name
+            self._core_zip_file.modify_file(name_to, templates.read_bytes(name_from))
 
             logger.info(f"Файл {name_from} копирован в {name_to}")
 
@@ -110,8 +110,7 @@ class WordFileCollection:
     __iadd__ = __add__
 
     def iter_names(self, name: str):
-        return iter(
-            _.name for _ in parent_path.joinpath(f"sources/{self.add_path_mode}/{name}/").iterdir())
+        return iter(templates.names(f"{self.add_path_mode}/{name}"))
 
     def add_word_files(self):
         for _ in self.iter_names("headers_footers"):
@@ -126,8 +125,7 @@ class WordFileCollection:
 
     def add_word_file_image(self):
         name: str = self._company_name.value
-        _: _WordFileImage = _WordFileImage(name, self._core_zip_file, self._document_mode)
-        word_file_image: _WordFileImage = _.duplicate()
+        word_file_image: _WordFileImage = _WordFileImage(name, self._core_zip_file, self._document_mode)
         self + word_file_image
 
     def add_word_file_military(self):
@@ -135,11 +133,11 @@ class WordFileCollection:
             word_file_military: _WordFileMilitary
             word_file_military = _WordFileMilitary("footer3.xml", self._core_zip_file, self._document_mode)
 
-            self._core_zip_file.delete(word_file_military.full_path_zip_archive)
+            self._core_zip_file.delete(word_file_military.zip_archive_name)
             self + word_file_military
 
             name_from: Path = word_file_military.basic_xml_file
-            name_to: Path = word_file_military.full_path_zip_archive
-            self._core_zip_file.copy(name_from, name_to)
+            name_to: str = word_file_military.zip_archive_name
+            self._core_zip_file.modify_file(name_to, templates.read_bytes(name_from))
 
             logger.success("Нижний колонтитул изменен для поставки МО РФ")
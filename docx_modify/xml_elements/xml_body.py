@@ -1,11 +1,7 @@
 # -*- coding: utf-8 -*-
-from pathlib import Path
+from lxml.etree import ElementBase
 
-from lxml import etree
-# noinspection PyProtectedMember
-from lxml.etree import ElementBase, _ElementTree
-
-from docx_modify.const import parent_path
+from docx_modify.core_elements.template_registry import templates
 from docx_modify.xml_elements.xml_document import XmlDocument
 from docx_modify.xml_elements.xml_element_factory import new_xml
 from docx_modify.xml_elements.xml_file import XmlFilePart
@@ -43,11 +39,8 @@ class XmlBody(XmlFilePart):
         self.add_before_last_child(p, "w:sectPr")
 
     def _add_list_change(self):
-        _xml_file: Path = parent_path.joinpath("sources/change_list/change_list_table.xml")
-        _element_tree: _ElementTree = etree.parse(_xml_file)
-
         element: ElementBase
-        for element in _element_tree.getroot().iterchildren():
+        for element in templates.children("change_list/change_list_table.xml"):
             self.add_before_last_child(element, "w:sectPr")
 
     def set_change_list(self):
@@ -1,84 +1,126 @@
 # -*- coding: utf-8 -*-
+from re import split
+from typing import Iterable, Mapping
+
 from loguru import logger
-from lxml.etree import ElementBase
+from lxml.etree import ElementBase, QName
 
-from docx_modify.const import HeaderFooter
+from docx_modify.core_elements.clark_tags import CT_DEFAULT, CT_OVERRIDE
 from docx_modify.core_elements.core_zip_file import CoreZipFile
-from docx_modify.enum_element import DocumentMode
+from docx_modify.init_logger import Deferred
 from docx_modify.xml_elements.xml_element_factory import new_xml_no_ns
 from docx_modify.xml_elements.xml_file import XmlFile
 
-_CONTENT_TYPES: tuple[str, str] = ("footer+xml", "header+xml")
-
+_WORDPROCESSINGML: str = "application/vnd.openxmlformats-officedocument.wordprocessingml"
+# the parts added by the program, found in the archive by the patterns
+_PART_CONTENT_TYPES: dict[str, str] = {
+    "word/header*.xml": f"{_WORDPROCESSINGML}.header+xml",
+    "word/footer*.xml": f"{_WORDPROCESSINGML}.footer+xml",
+    "docProps/custom.xml": "application/vnd.openxmlformats-officedocument.custom-properties+xml"}
+_HDR_FTR_CONTENT_TYPES: tuple[str, str] = ("footer+xml", "header+xml")
 
-def generate_hdr_ftr(hdr_ftr: HeaderFooter | str, max_value: int = 0):
-    content_type: str = f"application/vnd.openxmlformats-officedocument.wordprocessingml.{hdr_ftr}+xml"
 
-    _children: set[ElementBase] = set()
+def _natural_key(name: str) -> tuple[str | int, ...]:
+    # header2.xml goes before header10.xml
+    return tuple(int(item) if item.isdecimal() else item for item in split(r"(\d+)", name))
 
-    for index in range(1, max_value + 1):
-        attributes: dict[str, str] = {
-            "PartName": f"/word/{hdr_ftr}{index}.xml",
-            "ContentType": content_type}
-        child: ElementBase = new_xml_no_ns("Override", attributes=attributes)
-        _children.add(child)
 
-    return _children
+def _join_sorted(names: Iterable[str]) -> str:
+    return "\n".join(sorted(names, key=_natural_key))
 
 
 class XmlContentTypes(XmlFile):
-    _document_mode_nums: dict[DocumentMode, dict[HeaderFooter | str, int]] = {
-        DocumentMode.ARCH: {
-            "header": 4,
-            "footer": 7},
-        DocumentMode.TYPO: {
-            "header": 4,
-            "footer": 4},
-        DocumentMode.PROG: {
-            "header": 4,
-            "footer": 4}}
-
-    def __init__(self, core_zip_file: CoreZipFile, document_mode: DocumentMode):
+    """The [Content_Types].xml file.
+
+    The Default elements are indexed by the extension and the Override ones by the PartName,
+    so each part is added, found or deleted without scanning the file.
+    """
+
+    def __init__(self, core_zip_file: CoreZipFile):
         name: str = "[Content_Types].xml"
         super().__init__(name, core_zip_file)
-        self._document_mode: DocumentMode = document_mode
+        self._defaults: dict[str, ElementBase] = {}
+        self._overrides: dict[str, ElementBase] = {}
+
+    def read(self, **kwargs):
+        super().read(**kwargs)
+        self._defaults.clear()
+        self._overrides.clear()
+
+        for child in iter(self):
+            # the namespace is not checked, some producers omit it
+            local_name: str = QName(child).localname
+
+            if local_name == "Default":
+                self._defaults[child.get("Extension").lower()] = child
+
+            elif local_name == "Override":
+                self._overrides[child.get("PartName")] = child
+
+    def content_type(self, part_name: str) -> str | None:
+        """The content type of the part, the name is the ZIP member name or the PartName."""
+        _part_name: str = part_name if part_name.startswith("/") else f"/{part_name}"
 
-    def _add_png(self):
-        child: ElementBase = self.find_child("Extension", "png")
+        if _part_name in self._overrides:
+            return self._overrides.get(_part_name).get("ContentType")
+
+        _default: ElementBase | None = self._defaults.get(_part_name.rpartition(".")[2].lower())
+        return _default.get("ContentType") if _default is not None else None
+
+    def add_default(self, extension: str, content_type: str):
+        if extension.lower() in self._defaults:
+            logger.info(f"Extension {extension} обнаружено в списке")
+            return
+
+        attributes: dict[str, str] = {
+            "Extension": extension,
+            "ContentType": content_type}
+        child: ElementBase = new_xml_no_ns(CT_DEFAULT, attributes=attributes)
+        self.add_child(child)
+        self._defaults[extension.lower()] = child
+        logger.info(f"Extension {extension} добавлено")
+
+    def add_overrides(self, overrides: Mapping[str, str]):
+        """Adds or replaces the Override elements, PartName: ContentType, in the order of the names."""
+        for part_name in sorted(overrides, key=_natural_key):
+            if part_name in self._overrides:
+                self._overrides.get(part_name).set("ContentType", overrides.get(part_name))
+                continue
 
-        if child is None:
             attributes: dict[str, str] = {
-                "Extension": "png",
-                "ContentType": "image/png"}
-            child: ElementBase = new_xml_no_ns("Default", attributes=attributes)
+                "PartName": part_name,
+                "ContentType": overrides.get(part_name)}
+            child: ElementBase = new_xml_no_ns(CT_OVERRIDE, attributes=attributes)
             self.add_child(child)
-            logger.info("Extension png добавлено")
-
-        else:
-            logger.info("Extension png обнаружено в списке")
-
-    def _delete_override_headers_footers(self):
-        children: list[ElementBase] = [
-            child for child in self.get_descendants("{*}Override")
-            if child.get("ContentType").endswith(_CONTENT_TYPES)]
-        partnames: str = "\n".join(sorted(map(lambda x: x.get("PartName"), children)))
-        self.delete_children(children)
-        logger.info(f"Удалены части, PartName:\n{partnames}")
-
-    def _add_override_headers_footers(self):
-        _headers: set[ElementBase] = generate_hdr_ftr(
-            "header", self._document_mode_nums.get(self._document_mode).get("header"))
-        _footers: set[ElementBase] = generate_hdr_ftr(
-            "footer", self._document_mode_nums.get(self._document_mode).get("footer"))
-        _hdr_ftr: list[ElementBase] = [*_headers, *_footers]
-        self.add_children(_hdr_ftr)
-
-        _hdr_ftr_items: str = "\n".join(sorted(map(lambda x: x.get("PartName"), _hdr_ftr)))
-        logger.info(f"Добавлены части, PartNames:\n{_hdr_ftr_items}")
+            self._overrides[part_name] = child
+
+        logger.bind(details=Deferred(_join_sorted, [*overrides])).info("Добавлены части, PartNames:")
+
+    def delete_overrides(self, part_names: Iterable[str]):
+        _deleted: list[str] = []
+
+        for part_name in part_names:
+            child: ElementBase | None = self._overrides.pop(part_name, None)
+
+            if child is not None:
+                self.delete_child(child)
+                _deleted.append(part_name)
+
+        logger.bind(details=Deferred(_join_sorted, _deleted)).info("Удалены части, PartName:")
+
+    def _part_overrides(self) -> dict[str, str]:
+        """The overrides of the parts added by the program, found in the archive."""
+        return {
+            f"/{name}": content_type
+            for pattern, content_type in _PART_CONTENT_TYPES.items()
+            for name in self._core_zip_file.iter_files(pattern)}
 
     def fix_content_types(self):
         self.read()
-        self._add_png()
-        self._delete_override_headers_footers()
-        self._add_override_headers_footers()
+        self.add_default("png", "image/png")
+        # the old headers and footers are deleted from the archive, the new ones are added
+        self.delete_overrides([
+            part_name for part_name, child in self._overrides.items()
+            if child.get("ContentType", "").endswith(_HDR_FTR_CONTENT_TYPES)])
+        self.add_overrides(self._part_overrides())
         self.write()
@@ -1,28 +1,265 @@
 # -*- coding: utf-8 -*-
-from pathlib import Path
+from typing import BinaryIO, Callable
+from xml.parsers.expat import ExpatError, ParserCreate, XMLParserType
 
 from loguru import logger
 from lxml import etree
+from lxml.etree import ElementBase
 
+from docx_modify.core_elements.clark_tags import NS_W, W_SECT_PR
 from docx_modify.core_elements.core_zip_file import CoreZipFile
+from docx_modify.core_elements.xml_parser import xml_parser
+from docx_modify.exceptions import InvalidXmlFileError, RequiredXmlFileMissingError, XmlFileStreamedError
+from docx_modify.instrumentation import instrumentation
 from docx_modify.xml_elements.xml_file import XmlFile
 
+_NS_XML: str = "http://www.w3.org/XML/1998/namespace"
+
+
+def _quoteattr(value: str) -> str:
+    # xml.sax.saxutils imports urllib and ssl, too heavy for the start of the program
+    _value: str = value.replace("&", "&amp;").replace("<", "&lt;").replace('"', "&quot;")
+    return f'"{_value}"'
+
 
 class XmlDocument(XmlFile):
     def __init__(self, core_zip_file: CoreZipFile):
         name: str = "word/document.xml"
         super().__init__(name, core_zip_file)
+        self._sections: list[ElementBase] | None = None
 
-    def __len__(self):
-        return len(self.get_descendants("w:sectPr"))
+    def read(self, **kwargs):
+        super().read(**kwargs)
+        self._sections = None
+
+    @property
+    def sections(self) -> list[ElementBase]:
+        """The <w:sectPr> elements collected in a single traversal of the document."""
+        if self._sections is None:
+            self._sections = self.get_descendants(W_SECT_PR)
 
-    def _path_to_save(self) -> Path:
-        return self._core_zip_file.path_dir.joinpath(self._name)
+        return self._sections
+
+    def __len__(self):
+        return len(self.sections)
 
     def save(self):
         super().save()
-        logger.info(f"Документ сохранен в {self._path_to_save()}")
+        logger.info(f"Документ {self._name} сохранен")
+
+
+class XmlDocumentStream(XmlDocument):
+    """The word/document.xml file rewritten in a single pass without parsing the whole file.
+
+    The content is copied byte by byte, only the <w:sectPr> elements are parsed one at a time,
+    so the memory does not depend on the size of the document.
+
+    While the section is processed, the content is the stub <w:document><w:body> element
+    containing the section only, so XmlSection and XmlBody work with it as with the whole document.
+    """
+    chunk_size: int = 1 << 20
+
+    def __init__(self, core_zip_file: CoreZipFile):
+        super().__init__(core_zip_file)
+        self._section_handler: Callable[[int, ElementBase], None] | None = None
+        self._body_handler: Callable[[], None] | None = None
+        self._parser: XMLParserType | None = None
+        self._target: BinaryIO | None = None
+        # the bytes not written yet, self._offset is the position of the first one in the file
+        self._buffer: bytearray = bytearray()
+        self._offset: int = 0
+        self._written: int = 0
+        self._last_index: int = 0
+        self._scopes: list[dict[str | None, str]] = [{"xml": _NS_XML}]
+        self._depth: int = 0
+        self._body_depth: int | None = None
+        self._section_index: int = 0
+        self._section_start: int | None = None
+        self._section_end: int | None = None
+        self._section_depth: int | None = None
 
     def read(self, **kwargs):
-        self._etree = etree.parse(self.full_path)
-        self._content = self._etree.getroot()
+        # the content is the stub of the section being processed, never the whole document
+        logger.error(f"Файл {self._name} в потоковом режиме не загружается целиком")
+        raise XmlFileStreamedError
+
+    def save(self):
+        logger.info(f"Документ {self._name} сохранен")
+
+    def __len__(self):
+        return self._section_index
+
+    def process(
+            self,
+            section_handler: Callable[[int, ElementBase], None],
+            body_handler: Callable[[], None] | None = None):
+        """Rewrites the file.
+
+        The section_handler is called for each <w:sectPr> element with its index.
+        The body_handler is called for the last <w:sectPr> element, the child of <w:body>.
+        """
+        if not self._core_zip_file.exists(self._name):
+            logger.error(f"Файл {self._name} не найден")
+            raise RequiredXmlFileMissingError
+
+        self._section_handler = section_handler
+        self._body_handler = body_handler
+
+        self._parser = ParserCreate()
+        self._parser.StartElementHandler = self._start_element
+        self._parser.EndElementHandler = self._end_element
+
+        try:
+            with self._core_zip_file.rewrite_file(self._name) as (source, target):
+                self._target = target
+
+                while chunk := source.read(self.chunk_size):
+                    self._buffer += chunk
+                    self._parser.Parse(chunk, False)
+                    self._flush()
+
+                self._parser.Parse(b"", True)
+                self._flush(True)
+
+        except ExpatError as e:
+            logger.error(f"Файл {self._name} поврежден: {str(e)}")
+            raise InvalidXmlFileError
+
+        finally:
+            self._parser = None
+            self._target = None
+            self._content = None
+            self._buffer.clear()
+
+        # the file is parsed and serialized once, though by parts
+        instrumentation.count("parsed")
+        instrumentation.count("serialized")
+        logger.info(f"Файл {self._name} изменен, секций: {self._section_index}")
+
+    def _slice(self, start: int, end: int) -> bytes:
+        return bytes(self._buffer[start - self._offset:end - self._offset])
+
+    def _flush(self, final: bool = False):
+        if final:
+            end: int = self._offset + len(self._buffer)
+
+        elif self._section_start is not None:
+            end: int = self._section_start
+
+        else:
+            end: int = self._last_index
+
+        if end > self._written:
+            self._target.write(self._slice(self._written, end))
+            self._written = end
+
+        del self._buffer[:self._written - self._offset]
+        self._offset = self._written
+
+    def _tag_end(self, index: int) -> int:
+        """The position after the tag starting at the index, the quoted attribute values are skipped."""
+        quote: int | None = None
+
+        for position in range(index - self._offset, len(self._buffer)):
+            char: int = self._buffer[position]
+
+            if quote is not None:
+                if char == quote:
+                    quote = None
+
+            elif char in b"\"'":
+                quote = char
+
+            elif char == ord(">"):
+                return self._offset + position + 1
+
+        logger.error(f"Тег в позиции {index} файла {self._name} не закрыт")
+        raise InvalidXmlFileError
+
+    def _start_element(self, name: str, attrs: dict[str, str]):
+        self._last_index = self._parser.CurrentByteIndex
+        self._depth += 1
+
+        scope: dict[str | None, str] = self._scopes[-1]
+        _ns: dict[str | None, str] = {
+            k.partition(":")[2] or None: v for k, v in attrs.items() if k == "xmlns" or k.startswith("xmlns:")}
+
+        if _ns:
+            scope: dict[str | None, str] = {**scope, **_ns}
+
+        self._scopes.append(scope)
+
+        if self._section_start is not None:
+            return
+
+        prefix, _, local = name.rpartition(":")
+
+        if scope.get(prefix or None) != NS_W:
+            return
+
+        if local == "body" and self._depth == 2:
+            self._body_depth = self._depth
+
+        elif local == "sectPr":
+            self._section_start = self._last_index
+            self._section_depth = self._depth
+            tag_end: int = self._tag_end(self._last_index)
+
+            # the empty element <w:sectPr/> ends with the start tag
+            if self._buffer[tag_end - self._offset - 2] == ord("/"):
+                self._section_end = tag_end
+
+            else:
+                self._section_end = None
+
+    def _end_element(self, name: str):
+        self._last_index = self._parser.CurrentByteIndex
+
+        if self._section_start is not None and self._depth == self._section_depth:
+            if self._section_end is None:
+                self._section_end = self._tag_end(self._last_index)
+
+            self._replace_section()
+
+        self._scopes.pop()
+        self._depth -= 1
+
+    def _wrapper(self) -> tuple[str, str]:
+        scope: dict[str | None, str] = self._scopes[-1]
+        _ns: str = " ".join(
+            f"xmlns={_quoteattr(v)}" if k is None else f"xmlns:{k}={_quoteattr(v)}"
+            for k, v in scope.items() if k != "xml")
+        prefix: str | None = next((k for k, v in scope.items() if v == NS_W), None)
+        _w: str = f"{prefix}:" if prefix is not None else ""
+
+        return f"<{_w}document {_ns}><{_w}body>", f"</{_w}body></{_w}document>"
+
+    @staticmethod
+    def _serialize(element: ElementBase) -> bytes:
+        # the content of the stub elements without their tags and namespace declarations
+        content: bytes = etree.tostring(element, encoding="utf-8")
+        start: int = content.index(b">", content.index(b">") + 1) + 1
+        end: int = content.rindex(b"</", 0, content.rindex(b"</"))
+        return content[start:end]
+
+    def _replace_section(self):
+        is_body_section: bool = self._body_depth is not None and self._section_depth == self._body_depth + 1
+
+        start, end = self._wrapper()
+        raw: bytes = self._slice(self._section_start, self._section_end)
+        self._content = etree.fromstring(start.encode("utf-8") + raw + end.encode("utf-8"), xml_parser(self._name))
+
+        self._section_handler(self._section_index, self.get_child("w:body")[0])
+
+        if is_body_section and self._body_handler is not None:
+            self._body_handler()
+
+        self._target.write(self._slice(self._written, self._section_start))
+        self._target.write(self._serialize(self._content))
+
+        self._written = self._section_end
+        self._section_index += 1
+        self._section_start = None
+        self._section_end = None
+        self._section_depth = None
+        self._content = None
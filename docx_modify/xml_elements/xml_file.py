@@ -2,7 +2,6 @@
 from pathlib import Path
 
 from loguru import logger
-from lxml import etree
 # noinspection PyProtectedMember
 from lxml.etree import ElementBase, _ElementTree
 
@@ -59,12 +58,14 @@ class XmlFile(XmlObject):
         return self._content.getroottree()
 
     def write(self, **kwargs):
-        self._content_tree.write(self.full_path, encoding="utf-8", doctype=self.DOCTYPE)
-        logger.info(f"Файл {self.full_path} записан")
+        self._core_zip_file.write_tree(self._name, self._content_tree)
+        logger.info(f"Файл {self._name} изменен")
 
     def read(self, **kwargs):
-        if self._unzipped_file.full_path.exists():
-            self._etree = etree.parse(self._unzipped_file.full_path)
+        element_tree: _ElementTree | None = self._core_zip_file.read_tree(self._name)
+
+        if element_tree is not None:
+            self._etree = element_tree
             self._content = self._etree.getroot()
             self._exists: bool = True
 
@@ -75,22 +76,18 @@ class XmlFile(XmlObject):
                 raise RequiredXmlFileMissingError
 
             else:
-                self._unzipped_file.full_path.parent.mkdir(parents=True, exist_ok=True)
-                self._unzipped_file.full_path.touch(exist_ok=True)
                 logger.error(f"Файл {self._unzipped_file.name} не обнаружен, поэтому будет создан файл по умолчанию")
+                self._core_zip_file.modify_file(self._name, self._default)
+                logger.info(f"Файл {self._name} создан")
 
-                with open(self.full_path, "wb") as fw:
-                    fw.write(self._default)
-                    logger.info(f"Файл {self._name} создан")
-
-            self._content = etree.fromstring(self._default)
-            self._etree = self._content.getroottree()
+            self._etree = self._core_zip_file.read_tree(self._name)
+            self._content = self._etree.getroot()
             self._exists: bool = False
 
     def save(self):
-        if self._content_tree != self._etree:
-            self.write()
-            self._etree = self._content_tree
+        # the tree is shared with the archive, so it is only marked to be serialized
+        self.write()
+        self._etree = self._content_tree
 
     @property
     def core_zip_file(self):
@@ -123,10 +120,11 @@ class XmlFilePart(XmlObject):
         return f"<{self.__class__.__name__}({self._tag}, {repr(self._xml_file)}, {self._idx})>"
 
     def __key(self):
-        return self._xml_file.full_path, self._tag, self._idx
+        # noinspection PyProtectedMember
+        return self._xml_file.core_zip_file.path, self._xml_file._name, self._tag, self._idx
 
     def __hash__(self):
-        return hash((self._xml_file.full_path, self._tag, self._idx))
+        return hash(self.__key())
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
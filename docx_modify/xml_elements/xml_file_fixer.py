@@ -1,25 +1,28 @@
 # -*- coding: utf-8 -*-
-from pathlib import Path
-
 from loguru import logger
 from lxml import etree
 # noinspection PyProtectedMember
 from lxml.etree import ElementBase, _ElementTree
 
-from docx_modify.const import _MIRROR_ARCH_FORMULA, _SINGLE_ARCH_FORMULA, temp_path, parent_path
+from docx_modify.const import _MIRROR_ARCH_FORMULA, _SINGLE_ARCH_FORMULA
+from docx_modify.core_elements.core_zip_file import CoreZipFile
+from docx_modify.core_elements.template_registry import templates
+from docx_modify.core_elements.xml_parser import xml_parser
 from docx_modify.enum_element import DocumentMode, DocumentSide
 from docx_modify.exceptions import InvalidXmlFileError, InvalidOptionError
 from docx_modify.xml_elements.xml_object import XmlObject
 
 
 class XmlFileFixer:
-    _folder: Path = temp_path.joinpath("_docx_temp").joinpath("word")
+    _folder: str = "word"
 
     def __init__(
-            self, *,
+            self,
+            core_zip_file: CoreZipFile, *,
             document_mode: DocumentMode,
             document_side: DocumentSide,
             approvement_list: bool):
+        self._core_zip_file: CoreZipFile = core_zip_file
         self._xml_file_name: str | None = None
         self._xml_object: XmlObject | None = None
         self._document_mode: DocumentMode = document_mode
@@ -53,31 +56,33 @@ class XmlFileFixer:
             return NotImplemented
 
     @property
-    def full_xml_file_path(self):
-        return self._folder.joinpath(self._xml_file_name)
+    def zip_archive_name(self) -> str:
+        return f"{self._folder}/{self._xml_file_name}"
 
     def _clear(self):
         self._xml_file_name = None
         self._xml_object = None
 
     def _set_file(self, name: str):
-        path: Path = self._folder.joinpath(name)
+        path: str = f"{self._folder}/{name}"
 
-        if not path.exists():
+        if not self._core_zip_file.exists(path):
             logger.error(f"Файл {path} не найден")
             raise InvalidXmlFileError
 
-        elif path.suffix != ".xml":
+        elif not path.endswith(".xml"):
             logger.error(f"Некорректный файл {path} для обработки как XML-файла")
             raise InvalidXmlFileError
 
         self._xml_file_name: str = name
 
     def _read(self):
-        self._xml_object = XmlObject.read(self.full_xml_file_path)
+        element_tree: _ElementTree = self._core_zip_file.read_tree(self.zip_archive_name)
+        self._xml_object = XmlObject(element_tree.getroot())
 
     def _write(self):
-        self._xml_object.write(self.full_xml_file_path)
+        self._core_zip_file.write_tree(self.zip_archive_name, self._xml_object.root_tree)
+        logger.info(f"Файл {self.zip_archive_name} изменен")
 
     def _replace_formula(self):
         tag: str = "w:insertFormula"
@@ -86,11 +91,11 @@ class XmlFileFixer:
             return
 
         if self._document_side == DocumentSide.MIRROR:
-            element: ElementBase = etree.fromstring(_MIRROR_ARCH_FORMULA)
+            element: ElementBase = etree.fromstring(_MIRROR_ARCH_FORMULA, xml_parser())
             logger.success("Формула для подсчета страниц добавлена")
 
         elif self._document_side == DocumentSide.SINGLE:
-            element: ElementBase = etree.fromstring(_SINGLE_ARCH_FORMULA)
+            element: ElementBase = etree.fromstring(_SINGLE_ARCH_FORMULA, xml_parser())
             logger.success("Формула для подсчета листов добавлена")
 
         else:
@@ -104,10 +109,7 @@ class XmlFileFixer:
             return
 
         elif self._approvement_list:
-            xml: _ElementTree = etree.parse(parent_path.joinpath("sources/default/approvement_list.xml"))
-            root: ElementBase = xml.getroot()
-
-            for child in root.iterchildren():
+            for child in templates.children("default/approvement_list.xml"):
                 self._xml_object.add_child(child)
 
             logger.success("Информация про Лист утверждения добавлена")
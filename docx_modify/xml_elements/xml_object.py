@@ -7,12 +7,14 @@ from lxml import etree
 # noinspection PyProtectedMember
 from lxml.etree import ElementBase, _ElementTree
 
+from docx_modify.const import XML_DECLARATION
 from docx_modify.core_elements.clark_name import fqdn
+from docx_modify.core_elements.xml_parser import xml_parser
 from docx_modify.xml_elements.xml_element_factory import new_xml
 
 
 class XmlObject:
-    DOCTYPE: str = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    DOCTYPE: str = XML_DECLARATION
 
     def __init__(self, content: ElementBase | None = None):
         self._content: ElementBase | None = content
@@ -23,6 +25,10 @@ class XmlObject:
     def __repr__(self):
         return repr(self._content)
 
+    @property
+    def root_tree(self) -> _ElementTree:
+        return self._content.getroottree()
+
     def __iter__(self) -> Iterator[ElementBase]:
         return self._content.iterchildren()
 
@@ -116,7 +122,7 @@ class XmlObject:
 
     @classmethod
     def read(cls, path: Path):
-        _etree: _ElementTree = etree.parse(path)
+        _etree: _ElementTree = etree.parse(path, xml_parser(path))
         return cls(_etree.getroot())
 
     def write(self, **kwargs):
@@ -1,18 +1,16 @@
 # -*- coding: utf-8 -*-
-from re import Pattern, compile, RegexFlag, match
 from typing import NamedTuple
 
 from loguru import logger
 from lxml.etree import ElementBase
 
-from docx_modify.const import parent_path
 from docx_modify.core_elements.clark_name import fqdn
 from docx_modify.core_elements.core_zip_file import CoreZipFile
+from docx_modify.core_elements.template_registry import templates
 from docx_modify.enum_element import DocumentSide, CompanyName
 from docx_modify.exceptions import InvalidXmlElementError
 from docx_modify.xml_elements.xml_element_factory import new_xml_no_ns, new_xml
 from docx_modify.xml_elements.xml_file import XmlFile
-from docx_modify.xml_elements.xml_object import XmlObject
 
 
 class DocProperty(NamedTuple):
@@ -68,27 +66,51 @@ class DocProperty(NamedTuple):
         return element
 
 
-class XmlProperties(XmlFile):
-    patterns: dict[str, Pattern] = {
-        "_DocName_": compile(r"(?=.*doc|.*project)(?=.*name).*", RegexFlag.IGNORECASE),
-        "_DocType_": compile(r"(?=.*doc)(?=.*type)(?!.*short).*", RegexFlag.IGNORECASE),
-        "_DecimalNum_": compile(r"(?=.*dec)(?=.*num).*", RegexFlag.IGNORECASE),
-        "_DocTypeShort_": compile(r"(?=.*doc)(?=.*type)(?=.*short).*", RegexFlag.IGNORECASE)
-    }
+# the parts of the property names, each name is checked for all of them at once
+_NAME_PARTS: tuple[str, ...] = ("doc", "project", "name", "type", "short", "dec", "num")
+# the properties of the template in the order they are looked for, see _classify
+_PROPERTY_KEYS: tuple[str, ...] = ("_DocName_", "_DocType_", "_DecimalNum_", "_DocTypeShort_")
+
+
+def _classify(name: str) -> tuple[str, ...]:
+    """The properties of the template the property name corresponds to, in the order of _PROPERTY_KEYS.
+
+    The case is ignored, e.g. DocumentName and ProjectName are _DocName_, DocTypeShort is _DocTypeShort_.
+    """
+    _name: str = name.lower()
+    doc, project, _name_part, _type, short, dec, num = (part in _name for part in _NAME_PARTS)
+    _keys: list[str] = []
+
+    if (doc or project) and _name_part:
+        _keys.append("_DocName_")
+
+    if doc and _type and not short:
+        _keys.append("_DocType_")
 
+    if dec and num:
+        _keys.append("_DecimalNum_")
+
+    if doc and _type and short:
+        _keys.append("_DocTypeShort_")
+
+    return (*_keys,)
+
+
+class XmlProperties(XmlFile):
     def __init__(self, core_zip_file: CoreZipFile, document_side: DocumentSide):
         name: str = "docProps/custom.xml"
 
-        with open(parent_path.joinpath("sources/default/custom.xml").resolve(), "rb") as fb:
-            default: bytes = fb.read()
+        default: bytes = templates.read_bytes("default/custom.xml")
 
         super().__init__(name, core_zip_file, default)
         self._document_side: DocumentSide = document_side
-        self._doc_properties: list[DocProperty] = []
-        self._max_pid: int = -1
+        # the properties by name, the first one if the name is repeated
+        self._doc_properties: dict[str, DocProperty] = {}
+        self._elements: dict[str, ElementBase] = {}
+        self._max_pid: int = 1
 
     def __str__(self):
-        _str_properties: str = "\n".join(str(_property) for _property in self._doc_properties)
+        _str_properties: str = "\n".join(str(_property) for _property in self._doc_properties.values())
         return f"{self.__class__.__name__}:\n{_str_properties}\n"
 
     __repr__ = __str__
@@ -98,22 +120,21 @@ class XmlProperties(XmlFile):
 
     def __contains__(self, item):
         if isinstance(item, DocProperty):
-            return item in self._doc_properties
+            return self._doc_properties.get(item.name) == item
 
         elif isinstance(item, str):
-            return item in self.property_names
+            return item in self._doc_properties
 
         else:
             return False
 
     def __getitem__(self, item):
         if isinstance(item, (int, slice)):
-            return self._doc_properties[item]
+            return [*self._doc_properties.values()][item]
 
         elif isinstance(item, str):
-            for doc_property in self._doc_properties:
-                if doc_property.name == item:
-                    return doc_property
+            if item in self._doc_properties:
+                return self._doc_properties.get(item)
 
             else:
                 logger.info(f"Некорректный ключ {item}")
@@ -124,32 +145,42 @@ class XmlProperties(XmlFile):
 
     def __add__(self, other):
         if isinstance(other, DocProperty):
-            self._doc_properties.append(other)
+            self._doc_properties.setdefault(other.name, other)
+            self._max_pid = max(self._max_pid, other.pid)
 
         elif other is not None:
             logger.info(
                 f"Добавляемый элемент {str(other)} должен быть типа DocProperty или None, "
                 f"но получено {type(other)}")
 
+    def read(self, **kwargs):
+        super().read(**kwargs)
+        self._doc_properties.clear()
+        self._elements.clear()
+        # the pids of the custom properties start from 2
+        self._max_pid = 1
+
+        for child in iter(self):
+            doc_property: DocProperty = DocProperty.from_xml(child)
+            self._elements.setdefault(doc_property.name, child)
+            self + doc_property
+
     def _find_properties(self):
-        for k, v in self.patterns.items():
-            for doc_property in self._doc_properties:
-                name: str = doc_property.name
+        found: dict[str, DocProperty] = {}
+
+        for doc_property in self._doc_properties.values():
+            for k in _classify(doc_property.name):
+                if k not in found and doc_property.name != k:
+                    found[k] = doc_property
 
-                if match(v, name) and name != k:
-                    self._duplicate_property(name, k)
-                    break
+        for k in _PROPERTY_KEYS:
+            if k in found:
+                self._duplicate_property(found.get(k).name, k)
 
             else:
                 logger.warning(f"DocProperty {k} не найдено в документе")
 
     def set_properties(self, company_name: CompanyName):
-        doc_properties: list[DocProperty] = [DocProperty.from_xml(child) for child in iter(self)]
-
-        for doc_property in doc_properties:
-            self + doc_property
-
-        self._max_pid = len(self) + 1
         self._find_properties()
         self._add_page_sheet_property()
         self._add_company_name_property(company_name)
@@ -157,23 +188,32 @@ class XmlProperties(XmlFile):
 
     @property
     def property_names(self) -> set[str]:
-        return set(child.get(fqdn("name")) for child in iter(self))
+        return {*self._doc_properties}
 
     def _add_property(self, name: str, lpwstr: str):
+        """Adds the property with the next pid, the value of the existing one is replaced."""
+        if name in self._elements:
+            self._elements.get(name)[0].text = lpwstr
+            self._doc_properties[name] = self._doc_properties.get(name)._replace(lpwstr=lpwstr)
+            logger.info(f"DocProperty {name} уже задано, значение заменено на {lpwstr}")
+            return
+
         fmtid: str = "{D5CDD505-2E9C-101B-9397-08002B2CF9AE}"
         pid: int = self._max_pid + 1
         doc_property: DocProperty = DocProperty(fmtid, pid, name, lpwstr)
-        self.add_child(doc_property.element())
+        element: ElementBase = doc_property.element()
+        self.add_child(element)
 
-        self._max_pid += 1
+        self._elements[name] = element
+        self + doc_property
 
         logger.info(f"DocProperty {name} и значением {lpwstr} добавлено")
 
     def _duplicate_property(self, name_from: str, name_to: str):
-        if name_from not in self.property_names:
+        if name_from not in self._doc_properties:
             logger.info(f"DocProperty {name_from} не найдено")
 
-        elif name_to in self.property_names:
+        elif name_to in self._doc_properties:
             logger.info(f"DocProperty {name_to} уже задано")
 
         else:
@@ -199,15 +239,13 @@ class XmlProperties(XmlFile):
 
         self._add_property(name, lpwstr)
 
-    def get_property(self, property_name: str):
-        xml_object: XmlObject = XmlObject(self._content)
-        child: ElementBase | None = xml_object.find_child("name", property_name)
-
-        if child is None:
-            logger.error(
+    def get_property(self, property_name: str) -> DocProperty | None:
+        if property_name not in self._doc_properties:
+            # the default logo is used, the file is processed successfully
+            logger.warning(
                 f"В документе не найдено свойство {property_name}, "
                 f"поэтому используется логотип ПРОТЕЙ СТ по умолчанию")
             return None
 
         else:
-            return DocProperty.from_xml(child)
+            return self._doc_properties.get(property_name)
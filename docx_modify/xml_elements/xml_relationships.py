@@ -10,10 +10,27 @@ from docx_modify.xml_elements.xml_element_factory import new_xml
 from docx_modify.xml_elements.xml_file import XmlFile
 
 
+def _rel_id_number(rel_id: str) -> int | None:
+    """The number of the id "rId<N>", None for the ids of other forms."""
+    _number: str = rel_id[3:]
+    return int(_number) if rel_id.startswith("rId") and _number.isdecimal() else None
+
+
 class XmlRelationshipsFile(XmlFile):
+    """The relationships file.
+
+    The relationships are indexed by id, type and target, the indices are updated
+    along with the file, so no lookup scans the elements.
+    """
+
     def __init__(self, name: str, core_zip_file: CoreZipFile):
         super().__init__(name, core_zip_file)
         self._xml_relationships: dict[str, 'XmlRelationship'] = {}
+        self._elements: dict[str, ElementBase] = {}
+        self._type_ids: dict[XmlRelationshipType, dict[str, None]] = {}
+        self._target_ids: dict[str, dict[str, None]] = {}
+        # None if the greatest id has been deleted, it is found again only when required
+        self._max_id: int | None = 0
 
     def __getitem__(self, item):
         if isinstance(item, str):
@@ -36,7 +53,7 @@ class XmlRelationshipsFile(XmlFile):
         if isinstance(key, int):
             key: str = f"rId{key}"
 
-        self._xml_relationships[key] = value
+        self._index(key, value)
 
     def __contains__(self, item):
         if isinstance(item, str):
@@ -57,12 +74,52 @@ class XmlRelationshipsFile(XmlFile):
     def items(self):
         return self._xml_relationships.items()
 
+    def _index(self, rel_id: str, xml_relationship: 'XmlRelationship', element: ElementBase | None = None):
+        if rel_id in self._xml_relationships:
+            self._unindex(rel_id)
+
+        self._xml_relationships[rel_id] = xml_relationship
+
+        if element is not None:
+            self._elements[rel_id] = element
+
+        self._type_ids.setdefault(xml_relationship.rel_type, {})[rel_id] = None
+        self._target_ids.setdefault(xml_relationship.rel_target, {})[rel_id] = None
+
+        _number: int | None = _rel_id_number(rel_id)
+
+        if _number is not None and self._max_id is not None:
+            self._max_id = max(self._max_id, _number)
+
+    def _unindex(self, rel_id: str):
+        xml_relationship: XmlRelationship = self._xml_relationships.pop(rel_id)
+        self._elements.pop(rel_id, None)
+        self._type_ids.get(xml_relationship.rel_type, {}).pop(rel_id, None)
+        self._target_ids.get(xml_relationship.rel_target, {}).pop(rel_id, None)
+
+        if _rel_id_number(rel_id) == self._max_id:
+            self._max_id = None
+
     def set_xml_relationships(self):
+        self._xml_relationships.clear()
+        self._elements.clear()
+        self._type_ids.clear()
+        self._target_ids.clear()
+        self._max_id = 0
+
         for child in iter(self):
             rel_id: str = child.get("Id")
             rel_type: XmlRelationshipType = XmlRelationshipType(child.get("Type"))
             rel_target: str = child.get("Target")
-            self[rel_id] = XmlRelationship(rel_id, rel_type, rel_target, self)
+            self._index(rel_id, XmlRelationship(rel_id, rel_type, rel_target, self), child)
+
+    def rel_ids(self, rel_type: XmlRelationshipType) -> list[str]:
+        """The ids of the relationships of the type in the order of the file."""
+        return [*self._type_ids.get(rel_type, ())]
+
+    def rel_id(self, rel_target: str) -> str | None:
+        """The id of the first relationship to the target."""
+        return next(iter(self._target_ids.get(rel_target, ())), None)
 
     def __add__(self, other):
         if isinstance(other, XmlRelationship):
@@ -83,30 +140,30 @@ class XmlRelationshipsFile(XmlFile):
         else:
             return NotImplemented
 
-        self[xml_relationship.rel_id] = xml_relationship
-        rel: ElementBase = new_xml("Relationship", attributes=xml_relationship.attrs)
-        self.add_child(rel)
+        self.add_xml_relationship(xml_relationship)
         logger.info(f"Relationship {xml_relationship.rel_id}, Target {xml_relationship.rel_target} добавлено")
 
     __radd__ = __add__
     __iadd__ = __add__
 
     def __delitem__(self, key):
-        element: ElementBase = self.find_child("Id", key)
-
-        if element is not None:
-            self.delete_child(element)
-            del self._xml_relationships[key]
-            logger.info(f"XmlRelationship rId{key} удалено")
+        if key in self._elements:
+            self.delete_child(self._elements.get(key))
+            self._unindex(key)
+            logger.info(f"XmlRelationship {key} удалено")
 
         else:
-            logger.info(f"XmlRelationship rId{key} не найдено")
+            logger.info(f"XmlRelationship {key} не найдено")
 
         return
 
     def next_rel_id(self) -> int:
-        _rel_ids: tuple[int, ...] = tuple(map(lambda x: int(f"{x[3:]}"), self._xml_relationships.keys()))
-        return max(_rel_ids) + 1
+        if self._max_id is None:
+            _numbers: list[int] = [
+                _number for _number in map(_rel_id_number, self._xml_relationships) if _number is not None]
+            self._max_id = max(_numbers, default=0)
+
+        return self._max_id + 1
 
     def generate_xml_relationship(
             self,
@@ -141,20 +198,28 @@ class XmlRelationshipsFile(XmlFile):
         self.write()
 
     def add_xml_relationship(self, xml_relationship: 'XmlRelationship'):
+        """Adds the relationship, the id may be given either as "rId<N>" or as "<N>"."""
+        if xml_relationship.rel_id.startswith("rId"):
+            rel_id: str = xml_relationship.rel_id
+
+        else:
+            rel_id: str = f"rId{xml_relationship.rel_id}"
+
         _attrs: dict[str, str] = {
-            "Id": f"rId{xml_relationship.rel_id}",
+            "Id": rel_id,
             "Type": xml_relationship.rel_type.value,
             "Target": xml_relationship.rel_target}
 
         element: ElementBase = new_xml("Relationship", attributes=_attrs)
         self.add_child(element)
-        self._xml_relationships[f"rId{xml_relationship.rel_id}"] = xml_relationship
-        logger.info(f"Relationship rId{xml_relationship.rel_id} добавлено в документ")
+        self._index(rel_id, xml_relationship._replace(rel_id=rel_id), element)
+        logger.info(f"Relationship {rel_id} добавлено в документ")
 
     def hdr_ftr_references(self) -> dict[str, str]:
         return {
-            v.rel_target: k for k, v in self._xml_relationships.items()
-            if v.rel_type in (XmlRelationshipType.HEADER, XmlRelationshipType.FOOTER)}
+            self._xml_relationships.get(rel_id).rel_target: rel_id
+            for rel_type in (XmlRelationshipType.HEADER, XmlRelationshipType.FOOTER)
+            for rel_id in self._type_ids.get(rel_type, ())}
 
 
 class XmlRelationship(NamedTuple):
@@ -249,13 +314,19 @@ class XmlRelationshipsGlobal(XmlRelationshipsFile):
         super().__init__(name, core_zip_file)
 
     def add_custom(self):
+        """Adds the relationship to docProps/custom.xml if there is none."""
         self.set_xml_relationships()
 
         rel_type: XmlRelationshipType = XmlRelationshipType.CUSTOM_PROPERTIES
         rel_target: str = "docProps/custom.xml"
+
+        if self.rel_ids(rel_type):
+            logger.debug(f"В файле {self._name} уже есть XmlRelationship для {rel_target}")
+            return
         xml_relationship: XmlRelationship = self.generate_xml_relationship(rel_type, rel_target)
 
         self.add_xml_relationship(xml_relationship)
+        self.write()
 
         logger.info(
             f"В файл {self._name} было добавлено XmlRelationship {xml_relationship.rid} "
@@ -4,7 +4,8 @@ from typing import Type
 from loguru import logger
 from lxml.etree import ElementBase
 
-from docx_modify.core_elements.clark_name import fqdn
+from docx_modify.core_elements.clark_tags import R_ID, W_FOOTER_REFERENCE, W_HEADER_REFERENCE, W_ORIENT, W_PG_SZ, \
+    W_TYPE
 from docx_modify.enum_element import DocumentMode, SectionOrientation, SectionPgBorder, SectionPgMar, SectionPgSz, \
     DocumentSide
 from docx_modify.exceptions import InvalidOrientationError
@@ -20,13 +21,23 @@ class XmlSection(XmlFilePart):
             xml_document: XmlDocument,
             section_index: int,
             document_mode: DocumentMode,
-            document_side: DocumentSide):
+            document_side: DocumentSide,
+            element: ElementBase | None = None):
         tag: str = "w:sectPr"
         super().__init__(tag, xml_document, section_index)
         self._xml_document: XmlDocument = xml_document
         self._section_index: int = self._idx
         self._document_mode: DocumentMode = document_mode
         self._document_side: DocumentSide = document_side
+        self._element: ElementBase | None = element
+
+    def read(self, **kwargs):
+        # the element from the section index of the document, so the body is not traversed again
+        if self._element is None:
+            self._element = self._xml_document.sections[self._section_index]
+
+        self._prev_state = self._element
+        self._content = self._prev_state
 
     def _set_pg_num_type(self):
         raise NotImplementedError
@@ -45,7 +56,7 @@ class XmlSection(XmlFilePart):
 
     @property
     def orientation(self) -> SectionOrientation:
-        orient: str | None = self.get_child("w:pgSz").get(fqdn("w:orient"), None)
+        orient: str | None = self.get_child(W_PG_SZ).get(W_ORIENT, None)
 
         if orient is None or orient == "portrait":
             return SectionOrientation.PORTRAIT
@@ -80,14 +91,14 @@ class XmlSection(XmlFilePart):
         logger.info(f"Секция {self._section_index} задана")
 
     def _delete_header_footer_references(self):
-        _header_references = self.get_descendants("w:headerReference")
-        _footer_references = self.get_descendants("w:footerReference")
+        _header_references = self.get_descendants(W_HEADER_REFERENCE)
+        _footer_references = self.get_descendants(W_FOOTER_REFERENCE)
         self.delete_children([*_header_references, *_footer_references])
 
     def add_header_footer_reference(self, hdr_ftr_reference: HdrFtrReference):
         _attrs: dict[str, str] = {
-            str(fqdn("r:id")): f"{hdr_ftr_reference.rid}",
-            str(fqdn("w:type")): hdr_ftr_reference.ref_type.value}
+            R_ID: f"{hdr_ftr_reference.rid}",
+            W_TYPE: hdr_ftr_reference.ref_type.value}
 
         element: ElementBase = new_xml(hdr_ftr_reference.reference.value, attributes=_attrs)
         self.add_child(element, 0)
@@ -111,7 +122,8 @@ class XmlSection(XmlFilePart):
             self._xml_document,
             self._section_index,
             self._document_mode,
-            self._document_side)
+            self._document_side,
+            self._element)
 
 
 class XmlSectionTypo(XmlSection):
@@ -2,7 +2,7 @@
 from loguru import logger
 from lxml.etree import ElementBase
 
-from docx_modify.core_elements.clark_name import fqdn
+from docx_modify.core_elements.clark_tags import W_VAL
 from docx_modify.core_elements.core_zip_file import CoreZipFile
 from docx_modify.enum_element import DocumentSide, DocumentMode
 from docx_modify.xml_elements.xml_element_factory import new_xml
@@ -20,11 +20,11 @@ class XmlSettings(XmlFile):
         mirror_margins: ElementBase = self.get_or_add_child("w:mirrorMargins")
 
         if self._document_side == DocumentSide.MIRROR:
-            mirror_margins.set(fqdn("w:val"), "1")
+            mirror_margins.set(W_VAL, "1")
             logger.info("Зеркальные отступы заданы")
 
         elif self._document_side == DocumentSide.SINGLE:
-            mirror_margins.set(fqdn("w:val"), "0")
+            mirror_margins.set(W_VAL, "0")
             logger.info("Зеркальные отступы удалены")
 
     def _set_borders_do_not_surround(self):
@@ -34,24 +34,24 @@ class XmlSettings(XmlFile):
         borders_do_not_surround_footer: ElementBase = new_xml("w:bordersDoNotSurroundFooter")
 
         if self._document_mode == DocumentMode.ARCH:
-            borders_do_not_surround_header.set(fqdn("w:val"), "0")
-            borders_do_not_surround_footer.set(fqdn("w:val"), "0")
+            borders_do_not_surround_header.set(W_VAL, "0")
+            borders_do_not_surround_footer.set(W_VAL, "0")
             logger.info("Колонтитулы заключены в рамку")
 
         elif self._document_mode == DocumentMode.TYPO or self._document_mode == DocumentMode.PROG:
-            borders_do_not_surround_header.set(fqdn("w:val"), "1")
-            borders_do_not_surround_footer.set(fqdn("w:val"), "1")
+            borders_do_not_surround_header.set(W_VAL, "1")
+            borders_do_not_surround_footer.set(W_VAL, "1")
             logger.info("Колонтитулы не заключены в рамку")
 
     def _set_even_and_odd_headers(self):
         even_and_odd_headers: ElementBase = self.get_or_add_child("w:evenAndOddHeaders")
 
         if self._document_side == DocumentSide.MIRROR:
-            even_and_odd_headers.set(fqdn("w:val"), "1")
+            even_and_odd_headers.set(W_VAL, "1")
             logger.info("Колонтитулы для четных и нечетных страниц заданы")
 
         elif self._document_side == DocumentSide.SINGLE:
-            even_and_odd_headers.set(fqdn("w:val"), "0")
+            even_and_odd_headers.set(W_VAL, "0")
             logger.info("Колонтитулы для четных и нечетных страниц заданы")
 
     def _set_parameter(self, child: str, tag: str | None = None, value: str | None = None):
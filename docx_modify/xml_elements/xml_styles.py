@@ -1,48 +1,55 @@
 # -*- coding: utf-8 -*-
-from pathlib import Path
-from typing import Iterable, Iterator
+from typing import Iterator
 
 from loguru import logger
-from lxml import etree
-# noinspection PyProtectedMember
-from lxml.etree import ElementBase, _ElementTree
+from lxml.etree import ElementBase
 
-from docx_modify.const import parent_path
-from docx_modify.core_elements.clark_name import fqdn
+from docx_modify.core_elements.clark_tags import W_STYLE_ID
 from docx_modify.core_elements.core_zip_file import CoreZipFile
+from docx_modify.core_elements.template_registry import templates
 from docx_modify.xml_elements.xml_file import XmlFile
 
 
 class XmlStyles(XmlFile):
-    def __init__(self, core_zip_file: CoreZipFile, basic_file: Path, styles: Iterable[str] = None):
-        if styles is None:
-            styles: list[str] = []
+    """The word/styles.xml file to add the styles of the template file to.
 
+    The styles of the file are indexed by styleId once, the ones with the same ids as in the template
+    are replaced, so the repeated processing does not duplicate the styles.
+    """
+
+    def __init__(self, core_zip_file: CoreZipFile, basic_file: str):
         name: str = "word/styles.xml"
         super().__init__(name, core_zip_file)
-        self._basic_file: Path = basic_file
-        self._styles: tuple[str, ...] = *styles,
+        self._basic_file: str = basic_file
 
     def iter_styles(self) -> Iterator[str]:
-        return iter(self._styles)
+        """The ids of the styles of the template."""
+        return iter(templates.style_ids(self._basic_file))
+
+    def _index_styles(self) -> dict[str, list[ElementBase]]:
+        styles: dict[str, list[ElementBase]] = {}
+
+        for child in self.iter_child_tag("w:style"):
+            styles.setdefault(child.get(W_STYLE_ID), []).append(child)
+
+        return styles
 
     def add_styles(self):
         self.read()
-        _styles_id: tuple[str, ...] = tuple(child.get(fqdn("w:styleId")) for child in iter(self))
-        logger.info(f"{self.__class__.__name__}._styles_id = \n{_styles_id}")
+        styles: dict[str, list[ElementBase]] = self._index_styles()
+        logger.info(f"{self.__class__.__name__}: стилей в документе {len(styles)}")
 
         for style in self.iter_styles():
-            if style in _styles_id:
-                _style_xml: ElementBase | None = self.find_child("w:styleId", style)
-                self.delete_child(_style_xml)
-                logger.info(f"Стиль {style} удален")
+            _styles: list[ElementBase] = styles.pop(style, [])
+            self.delete_children(_styles)
 
-        _et: _ElementTree = etree.parse(self._basic_file)
-        _root: ElementBase = _et.getroot()
+            if _styles:
+                logger.info(f"Стиль {style} удален")
 
-        for file_style in tuple(_root):
-            self.add_child(file_style)
-            logger.info(f"Стиль {file_style.get(fqdn('w:styleId'))} добавлен")
+        file_styles: list[ElementBase] = templates.children(self._basic_file)
+        self.add_children(file_styles)
+        _file_styles: str = ", ".join(file_style.get(W_STYLE_ID) for file_style in file_styles)
+        logger.info(f"Стили добавлены: {_file_styles}")
 
         self.write()
         logger.info("XML-стили обновлены")
@@ -51,24 +58,11 @@ class XmlStyles(XmlFile):
 
 class XmlBasicStyles(XmlStyles):
     def __init__(self, core_zip_file: CoreZipFile):
-        basic_file: Path = parent_path.joinpath("sources/styles/styles.xml")
-        styles: tuple[str, ...] = (
-            "_style_table_11_",
-            "_style_table_11_left_",
-            "_style_12_center_",
-            "_style_12_table_footer_",
-            "_style_text_14_",
-            "_style_text_14_left_",
-            "_style_text_16_",
-            "_table_style_new_grid_")
-        super().__init__(core_zip_file, basic_file, styles)
+        basic_file: str = "styles/styles.xml"
+        super().__init__(core_zip_file, basic_file)
 
 
 class XmlChangeListStyles(XmlStyles):
     def __init__(self, core_zip_file: CoreZipFile):
-        basic_file: Path = parent_path.joinpath("sources/change_list_styles/styles.xml")
-        styles: tuple[str, ...] = (
-            "_table_style_change_list_",
-            "_change_list_text_",
-            "_change_list_header_")
-        super().__init__(core_zip_file, basic_file, styles)
+        basic_file: str = "change_list_styles/styles.xml"
+        super().__init__(core_zip_file, basic_file)
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from pathlib import Path
+from typing import Callable, Iterator, Mapping
+from zipfile import ZIP_DEFLATED, ZipFile, ZipInfo
+
+import pytest
+
+from docx_modify.core_elements.parallel_deflate import parallel_deflate
+from docx_modify.result_cache import result_cache
+
+
+@pytest.fixture(autouse=True)
+def no_result_cache() -> Iterator[None]:
+    # the tests never read or fill the cache of the user
+    max_size: int = result_cache.max_size
+    result_cache.configure(0)
+    yield
+    result_cache.configure(max_size)
+
+
+@pytest.fixture
+def deflate_threads() -> Iterator[Callable[[int], None]]:
+    """Sets the number of the compression threads, the previous one is restored after the test."""
+    threads: int = parallel_deflate.threads
+
+    yield lambda value: parallel_deflate.configure(threads=value)
+
+    parallel_deflate.configure(threads=threads)
+
+
+@pytest.fixture
+def make_zip(tmp_path: Path) -> Callable[..., Path]:
+    """Writes the archive of the members, name: content, with the fixed timestamps."""
+
+    def _make_zip(members: Mapping[str, bytes], name: str = "source.docx", compress_type: int = ZIP_DEFLATED) -> Path:
+        path: Path = tmp_path.joinpath(name)
+
+        with ZipFile(path, "w") as zf:
+            for member_name, content in members.items():
+                zip_info: ZipInfo = ZipInfo(member_name, (1980, 1, 1, 0, 0, 0))
+                zip_info.compress_type = compress_type
+                zf.writestr(zip_info, content)
+
+        return path
+
+    return _make_zip
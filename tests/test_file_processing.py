@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from collections import Counter
+from pathlib import Path
+from zipfile import ZipFile
+
+from lxml import etree
+from lxml.etree import ElementBase
+
+from benchmarks.corpus import CorpusCase, make_document
+from docx_modify.enum_element import DocumentMode, DocumentSide, FileItem
+from docx_modify.file_processing import file_modify
+
+
+def _reprocessed(tmp_path: Path) -> Path:
+    """The document processed twice, the second time the new file of the first run is processed."""
+    path: Path = make_document(tmp_path.joinpath("source.docx"), CorpusCase())
+
+    for _ in range(2):
+        file_item: FileItem = FileItem(path, DocumentMode.ARCH, DocumentSide.MIRROR, False, True, True)
+        path: Path = Path(file_modify(file_item))
+
+    return path
+
+
+def _names(path: Path, name: str, xpath: str) -> Counter:
+    with ZipFile(path) as zf:
+        root: ElementBase = etree.fromstring(zf.read(name))
+
+    return Counter(root.xpath(xpath))
+
+
+def test_properties_not_duplicated(tmp_path):
+    names: Counter = _names(_reprocessed(tmp_path), "docProps/custom.xml", "/*/*[local-name()='property']/@name")
+
+    assert names["_Page_Sheet_"] == 1
+    assert names["_Company_Name_"] == 1
+
+
+def test_styles_not_duplicated(tmp_path):
+    style_ids: Counter = _names(
+        _reprocessed(tmp_path), "word/styles.xml", "/*/*[local-name()='style']/@*[local-name()='styleId']")
+
+    assert style_ids
+    assert all(count == 1 for count in style_ids.values()), style_ids
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+from io import BytesIO, RawIOBase
+from pathlib import Path
+from random import Random
+from struct import unpack
+from typing import Callable, NamedTuple
+from zipfile import ZIP_DEFLATED, LargeZipFile, ZipFile, ZipInfo
+
+import pytest
+# noinspection PyProtectedMember
+from lxml.etree import SubElement, _ElementTree, tostring
+
+from docx_modify.const import XML_DECLARATION
+from docx_modify.core_elements import updated_zip_file
+from docx_modify.core_elements.updated_zip_file import UpdatedZipFile
+from docx_modify.core_elements.xml_parser import parse_xml
+
+_NS_W: str = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+class LocalHeader(NamedTuple):
+    """The fields of the local file header required by the tests."""
+    flag_bits: int
+    crc: int
+    compress_size: int
+    file_size: int
+    extra: bytes
+
+    @property
+    def zip64(self) -> bool:
+        return 1 in _extra_ids(self.extra)
+
+
+def _extra_ids(extra: bytes) -> list[int]:
+    ids: list[int] = []
+    index: int = 0
+
+    while index + 4 <= len(extra):
+        header_id, size = unpack("<2H", extra[index:index + 4])
+        ids.append(header_id)
+        index += 4 + size
+
+    return ids
+
+
+def _local_header(path: Path, zip_info: ZipInfo) -> LocalHeader:
+    with open(path, "rb") as fb:
+        fb.seek(zip_info.header_offset)
+        header: bytes = fb.read(30)
+        assert header[:4] == b"PK\x03\x04"
+        flag_bits, = unpack("<H", header[6:8])
+        crc, compress_size, file_size, name_length, extra_length = unpack("<3L2H", header[14:30])
+        fb.seek(name_length, 1)
+        return LocalHeader(flag_bits, crc, compress_size, file_size, fb.read(extra_length))
+
+
+def _compressed(path: Path) -> dict[str, bytes]:
+    """The compressed data of the members, the timestamps of the new members are not compared."""
+    compressed: dict[str, bytes] = {}
+
+    with ZipFile(path) as zf, open(path, "rb") as fb:
+        for zip_info in zf.infolist():
+            fb.seek(zip_info.header_offset + 26)
+            name_length, extra_length = unpack("<2H", fb.read(4))
+            fb.seek(name_length + extra_length, 1)
+            compressed[zip_info.filename] = fb.read(zip_info.compress_size)
+
+    return compressed
+
+
+def _document(paragraphs: int) -> bytes:
+    random: Random = Random(paragraphs)
+    body: str = "".join(f"<w:p><w:r><w:t>{random.random()}</w:t></w:r></w:p>" for _ in range(paragraphs))
+    return f'{XML_DECLARATION}\n<w:document xmlns:w="{_NS_W}"><w:body>{body}</w:body></w:document>'.encode()
+
+
+def _serialized(element_tree: _ElementTree) -> bytes:
+    return tostring(element_tree, encoding="utf-8", doctype=XML_DECLARATION)
+
+
+def _archive(
+        source: Path,
+        tmp_path: Path,
+        in_memory: bool,
+        changes: Callable[[UpdatedZipFile], None] | None = None,
+        trees: dict[str, _ElementTree] | None = None) -> Path:
+    output: Path = tmp_path.joinpath("output.docx")
+    path_dir: Path | None = None if in_memory else tmp_path.joinpath("unpacked")
+    updated: UpdatedZipFile = UpdatedZipFile(source, path_dir, in_memory, output)
+    updated.unarchive()
+
+    if changes is not None:
+        changes(updated)
+
+    try:
+        updated.archive(trees)
+
+    finally:
+        updated.close()
+
+    return output
+
+
+def _check_archive(path: Path, expected: dict[str, bytes]):
+    """The archive is valid, has the expected members and the local headers agree with the central directory."""
+    with ZipFile(path) as zf:
+        assert zf.testzip() is None
+        assert sorted(zf.namelist()) == sorted(expected)
+
+        for zip_info in zf.infolist():
+            assert zf.read(zip_info) == expected.get(zip_info.filename), zip_info.filename
+            local_header: LocalHeader = _local_header(path, zip_info)
+            # the sizes and CRC are in the local header, no data descriptor follows the data
+            assert not local_header.flag_bits & 0x08
+            assert local_header.crc == zip_info.CRC
+
+            if not local_header.zip64:
+                assert local_header.compress_size == zip_info.compress_size
+                assert local_header.file_size == zip_info.file_size
+
+
+in_memory_modes = pytest.mark.parametrize("in_memory", [True, False], ids=["memory", "disk"])
+
+
+@in_memory_modes
+@pytest.mark.parametrize("threads", [1, 3])
+def test_round_trip(make_zip, tmp_path, deflate_threads, in_memory, threads):
+    deflate_threads(threads)
+    # the document is larger than the chunk compressed by a thread
+    document: bytes = _document(60000)
+    image: bytes = Random(0).randbytes(300000)
+    source: Path = make_zip({
+        "[Content_Types].xml": b"<Types/>",
+        "word/document.xml": document,
+        "word/styles.xml": b"<styles/>",
+        "word/media/image1.png": image,
+        "docProps/app.xml": b"<Properties/>"})
+
+    element_tree: _ElementTree = parse_xml(document, "word/document.xml")
+    SubElement(element_tree.getroot()[0], f"{{{_NS_W}}}sectPr")
+    header: _ElementTree = parse_xml(f'<w:hdr xmlns:w="{_NS_W}"><w:p/></w:hdr>'.encode())
+
+    def changes(updated: UpdatedZipFile):
+        updated.modify_file("word/styles.xml", b"<styles><style/></styles>")
+        updated.modify_file("word/footer1.xml", b"<ftr/>")
+        updated.delete_file("docProps/app.xml")
+
+    output: Path = _archive(
+        source, tmp_path, in_memory, changes, {"word/document.xml": element_tree, "word/header1.xml": header})
+
+    _check_archive(output, {
+        "[Content_Types].xml": b"<Types/>",
+        "word/document.xml": _serialized(element_tree),
+        "word/styles.xml": b"<styles><style/></styles>",
+        "word/media/image1.png": image,
+        "word/footer1.xml": b"<ftr/>",
+        "word/header1.xml": _serialized(header)})
+    assert not tmp_path.joinpath("output.docx.tmp").exists()
+
+
+def test_same_archive_whatever_threads(make_zip, tmp_path, deflate_threads):
+    document: bytes = _document(60000)
+    source: Path = make_zip({"word/document.xml": document, "word/styles.xml": b"<styles/>"})
+    archives: list[dict[str, bytes]] = []
+
+    for threads in (1, 4):
+        deflate_threads(threads)
+        element_tree: _ElementTree = parse_xml(document, "word/document.xml")
+        output: Path = _archive(
+            source, tmp_path, True, lambda updated: updated.modify_file("word/styles.xml", document),
+            {"word/document.xml": element_tree})
+        archives.append(_compressed(output))
+
+    assert archives[0] == archives[1]
+
+
+class _Unseekable(RawIOBase):
+    """The stream zipfile writes the data descriptors to, as it cannot go back to the local header."""
+
+    def __init__(self):
+        super().__init__()
+        self.buffer: BytesIO = BytesIO()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        return self.buffer.write(data)
+
+
+@in_memory_modes
+def test_raw_copy_of_member_with_different_local_header(tmp_path, in_memory):
+    # the local headers have the ZIP64 fields and the data descriptors, the central directory has neither
+    members: dict[str, bytes] = {
+        "word/document.xml": _document(100),
+        "word/media/image1.png": Random(1).randbytes(5000),
+        "empty.xml": b""}
+    stream: _Unseekable = _Unseekable()
+
+    with ZipFile(stream, "w", ZIP_DEFLATED) as zf:
+        for name, content in members.items():
+            with zf.open(ZipInfo(name, (1980, 1, 1, 0, 0, 0)), "w", force_zip64=True) as member:
+                member.write(content)
+
+    source: Path = tmp_path.joinpath("source.docx")
+    source.write_bytes(stream.buffer.getvalue())
+
+    with ZipFile(source) as zf:
+        for zip_info in zf.infolist():
+            local_header: LocalHeader = _local_header(source, zip_info)
+            assert local_header.zip64 and local_header.flag_bits & 0x08
+            assert 1 not in _extra_ids(zip_info.extra)
+
+    output: Path = _archive(source, tmp_path, in_memory)
+
+    _check_archive(output, members)
+
+    with ZipFile(output) as zf:
+        assert not any(_local_header(output, zip_info).zip64 for zip_info in zf.infolist())
+
+
+@in_memory_modes
+def test_empty_members(make_zip, tmp_path, in_memory):
+    source: Path = make_zip({"word/document.xml": _document(10), "empty.bin": b""})
+
+    def changes(updated: UpdatedZipFile):
+        updated.modify_file("new_empty.xml", b"")
+        updated.modify_file("word/document.xml", b"")
+
+    output: Path = _archive(source, tmp_path, in_memory, changes)
+
+    _check_archive(output, {"word/document.xml": b"", "empty.bin": b"", "new_empty.xml": b""})
+
+
+@in_memory_modes
+def test_zip64_local_headers(make_zip, tmp_path, monkeypatch, in_memory):
+    # the limits are lowered, so the members exceed them without writing gigabytes
+    monkeypatch.setattr(updated_zip_file, "ZIP64_LIMIT", 1000)
+    monkeypatch.setattr(updated_zip_file, "_ZIP64_HINT", 500)
+    document: bytes = _document(200)
+    image: bytes = Random(2).randbytes(3000)
+    styles: bytes = Random(3).randbytes(2000)
+    source: Path = make_zip({
+        "word/document.xml": document,
+        "word/media/image1.png": image,
+        "word/styles.xml": b"<styles/>",
+        "small.xml": b"<small/>"})
+
+    element_tree: _ElementTree = parse_xml(document, "word/document.xml")
+    output: Path = _archive(
+        source, tmp_path, in_memory, lambda updated: updated.modify_file("word/styles.xml", styles),
+        {"word/document.xml": element_tree})
+
+    _check_archive(output, {
+        "word/document.xml": _serialized(element_tree),
+        "word/media/image1.png": image,
+        "word/styles.xml": styles,
+        "small.xml": b"<small/>"})
+
+    with ZipFile(output) as zf:
+        zip64: dict[str, bool] = {
+            zip_info.filename: _local_header(output, zip_info).zip64 for zip_info in zf.infolist()}
+
+    # the tree and the file on disk have the field reserved, the other members exceed the limit
+    assert zip64 == {
+        "word/document.xml": True,
+        "word/media/image1.png": True,
+        "word/styles.xml": True,
+        "small.xml": False}
+
+
+@in_memory_modes
+def test_large_tree_without_zip64(make_zip, tmp_path, monkeypatch, in_memory):
+    monkeypatch.setattr(updated_zip_file, "ZIP64_LIMIT", 1000)
+    monkeypatch.setattr(updated_zip_file, "_ZIP64_HINT", 10 ** 9)
+    document: bytes = _document(1)
+    source: Path = make_zip({"word/document.xml": document})
+
+    # the tree grows beyond the limit, but the source part is too small to reserve the field
+    element_tree: _ElementTree = parse_xml(document, "word/document.xml")
+
+    for _ in range(200):
+        SubElement(element_tree.getroot()[0], f"{{{_NS_W}}}p")
+
+    with pytest.raises(LargeZipFile):
+        _archive(source, tmp_path, in_memory, trees={"word/document.xml": element_tree})
+
+    assert not tmp_path.joinpath("output.docx").exists()
+    assert not tmp_path.joinpath("output.docx.tmp").exists()
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+from pathlib import Path
+from zipfile import ZipFile
+
+import pytest
+from lxml import etree
+from lxml.etree import ElementBase, SubElement
+
+from benchmarks.corpus import CorpusCase, make_document
+from docx_modify.core_elements.clark_tags import NS_W
+from docx_modify.core_elements.core_document import CoreDocument
+from docx_modify.core_elements.core_zip_file import CoreZipFile
+from docx_modify.enum_element import DocumentMode, DocumentSide, FileItem
+from docx_modify.file_processing import file_modify
+from docx_modify.xml_elements.xml_document import XmlDocument, XmlDocumentStream
+
+_NS_R: str = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_DECLARATION: str = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+
+
+def _section(attributes: str = "", orientation: str = "") -> str:
+    return (
+        f'<w:sectPr{attributes}><w:headerReference w:type="default" r:id="rId3"/>'
+        f'<w:pgSz w:w="11906" w:h="16838"{orientation}/>'
+        f'<w:pgMar w:top="1134" w:right="850" w:bottom="1134" w:left="1701" w:header="708" w:footer="708" '
+        f'w:gutter="0"/></w:sectPr>')
+
+
+_LANDSCAPE: str = ' w:orient="landscape"'
+_NESTED: str = (
+    f'<w:document xmlns:w="{NS_W}" xmlns:r="{_NS_R}"><w:body>'
+    f'<w:p><w:pPr><w:jc w:val="left"/>{_section(orientation=_LANDSCAPE)}</w:pPr>'
+    f'<w:r><w:t>text</w:t></w:r></w:p><w:p/>{_section()}</w:body></w:document>')
+_PREFIX: str = _NESTED.replace("w:", "x:").replace("xmlns:w=", "xmlns:x=")
+# the attributes keep the prefix, the default namespace is not applied to them
+_DEFAULT: str = _NESTED.replace("<w:", "<").replace("</w:", "</").replace(
+    "xmlns:w=", f'xmlns="{NS_W}" xmlns:w=', 1)
+_GREATER_PARAGRAPH: str = ' w:rsidR="e>f"'
+_GREATER_BODY: str = """ w:rsidSect='g"h>i'"""
+_GREATER: str = (
+    f'<w:document xmlns:w="{NS_W}" xmlns:r="{_NS_R}" w:x="a>b"><w:body>'
+    f'<w:p w:rsidR="c>d"><w:pPr>{_section(_GREATER_PARAGRAPH)}</w:pPr></w:p>'
+    f'{_section(_GREATER_BODY)}</w:body></w:document>')
+
+
+def _c14n(content: bytes) -> bytes:
+    return etree.tostring(etree.fromstring(content), method="c14n")
+
+
+def _replace_document(path: Path, document: str) -> Path:
+    """The copy of the archive with word/document.xml replaced."""
+    result: Path = path.with_stem(f"{path.stem}_test")
+
+    with ZipFile(path) as source, ZipFile(result, "w") as target:
+        for zip_info in source.infolist():
+            if zip_info.filename == "word/document.xml":
+                content: bytes = f"{_DECLARATION}{document}".encode()
+
+            else:
+                content: bytes = source.read(zip_info)
+
+            target.writestr(zip_info, content)
+
+    return result
+
+
+def _modified_document(path: Path, streaming: bool) -> bytes:
+    file_item: FileItem = FileItem(path, DocumentMode.ARCH, DocumentSide.MIRROR, False, True, False)
+    name_updated: Path = Path(file_modify(file_item, streaming=streaming))
+
+    with ZipFile(name_updated) as zf:
+        content: bytes = zf.read("word/document.xml")
+
+    name_updated.unlink()
+    return content
+
+
+@pytest.mark.parametrize(
+    "document", [_NESTED, _PREFIX, _DEFAULT, _GREATER], ids=["nested", "prefix", "default", "greater"])
+def test_same_document_as_file(tmp_path, document):
+    source: Path = _replace_document(make_document(tmp_path.joinpath("source.docx"), CorpusCase()), document)
+
+    modified: bytes = _modified_document(source, False)
+
+    assert _c14n(_modified_document(source, True)) == _c14n(modified)
+    assert _c14n(modified) != _c14n(document.encode())
+
+
+def _handler(_: int, section: ElementBase):
+    section.set(f"{{{NS_W}}}rsidSect", "00AB")
+    SubElement(section, f"{{{NS_W}}}titlePg")
+
+
+def _rewritten(path: Path, streaming: bool) -> bytes:
+    core_document: CoreDocument = CoreDocument(path)
+    core_document.set_output("out")
+    core_zip_file: CoreZipFile = CoreZipFile(core_document, True)
+    core_zip_file.unarchive()
+
+    with core_zip_file as core_zf:
+        if streaming:
+            XmlDocumentStream(core_zf).process(_handler)
+
+        else:
+            xml_document: XmlDocument = XmlDocument(core_zf)
+            xml_document.read()
+
+            for index, section in enumerate(xml_document.sections):
+                _handler(index, section)
+
+            xml_document.save()
+
+        return core_zf.read_file("word/document.xml")
+
+
+_EMPTY: str = (
+    f'<w:document xmlns:w="{NS_W}" xmlns:r="{_NS_R}"><w:body>'
+    f'<w:p><w:pPr><w:sectPr/></w:pPr></w:p><w:p><w:pPr><w:sectPr /></w:pPr></w:p>'
+    f'<w:p><w:pPr><w:sectPr w:rsidR="a>b"/></w:pPr></w:p><w:p><w:pPr><w:sectPr w:rsidR=\'c/>d\'/></w:pPr></w:p>'
+    f'<w:p><w:pPr>{_section()}</w:pPr></w:p><w:sectPr/></w:body></w:document>')
+
+
+@pytest.mark.parametrize("chunk_size", [7, XmlDocumentStream.chunk_size])
+@pytest.mark.parametrize(
+    "document", [_EMPTY, _NESTED, _PREFIX, _DEFAULT, _GREATER], ids=["empty", "nested", "prefix", "default", "greater"])
+def test_same_sections_as_file(make_zip, monkeypatch, chunk_size, document):
+    # the small chunks split the tags and the attribute values between the parser calls
+    monkeypatch.setattr(XmlDocumentStream, "chunk_size", chunk_size)
+    source: Path = make_zip({"word/document.xml": f"{_DECLARATION}{document}".encode()})
+
+    rewritten: bytes = _rewritten(source, False)
+
+    assert _c14n(_rewritten(source, True)) == _c14n(rewritten)
+    sections: int = sum(1 for _ in etree.fromstring(document).iter(f"{{{NS_W}}}sectPr"))
+    assert sections > 0
+    assert rewritten.count(b"titlePg") == sections